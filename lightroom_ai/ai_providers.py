@@ -3,7 +3,9 @@ AI provider interface and factory.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, Type, List, Callable
+from typing import Dict, Any, Optional, Type, List, Callable, Iterator
+import asyncio
+import functools
 import time
 
 from .config import AppConfig
@@ -13,6 +15,24 @@ from .utils import extract_json
 
 logger = get_logger(__name__)
 
+# 1x1 PNG sent with text prompts to providers that only accept image requests
+_BLANK_IMAGE_B64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+
+class RateLimitError(Exception):
+    """Raised by a provider's text requests when the API answers HTTP 429."""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        """
+        Initialize the error.
+        
+        Args:
+            message: Error message
+            retry_after: Seconds the API asked us to wait, from its Retry-After header
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 class AiProvider(ABC):
     """Abstract base class for AI providers."""
     
@@ -75,6 +95,10 @@ class AiProvider(ABC):
                 if attempt < self.max_retries - 1:
                     logger.info(f"Retrying API call in {2 ** attempt} seconds (attempt {attempt + 1}/{self.max_retries})")
                     time.sleep(2 ** attempt)  # Exponential backoff
+            except RateLimitError:
+                # The caller holds off all of its requests until the limit has
+                # passed, so this one is not retried on its own
+                raise
             except Exception as e:
                 logger.error(f"Error in API call (attempt {attempt + 1}): {str(e)}")
                 if attempt < self.max_retries - 1:
@@ -84,6 +108,26 @@ class AiProvider(ABC):
         logger.error(f"Failed to get valid response after {self.max_retries} attempts")
         return None
     
+    @staticmethod
+    def raise_for_rate_limit(response: Any) -> None:
+        """
+        Raise RateLimitError if an HTTP response reports a rate limit.
+        
+        Args:
+            response: HTTP response from the provider API
+            
+        Raises:
+            RateLimitError: If the response status is 429
+        """
+        if getattr(response, 'status_code', None) != 429:
+            return
+        
+        try:
+            retry_after = float(response.headers.get('Retry-After'))
+        except (AttributeError, TypeError, ValueError):
+            retry_after = None
+        raise RateLimitError("API rate limit exceeded (HTTP 429)", retry_after)
+    
     def get_analysis_prompt(self) -> str:
         """
         Get the prompt for image analysis.
@@ -131,3 +175,68 @@ class AiProvider(ABC):
             Dictionary with analysis results if successful, None otherwise
         """
         pass
+    
+    async def aanalyze_image(self, image_b64: str, user_prompt: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Analyze an image asynchronously.
+        
+        The default implementation runs analyze_image in a worker thread so
+        that several requests can be awaited concurrently. Providers with a
+        native async client can override this.
+        
+        Args:
+            image_b64: Base64-encoded image string
+            user_prompt: Optional custom user prompt
+            
+        Returns:
+            Dictionary with analysis results if successful, None otherwise
+        """
+        # run_in_executor rather than asyncio.to_thread, which needs Python 3.9
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.analyze_image, image_b64, user_prompt))
+    
+    def analyze_text(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Send a text-only prompt and return the raw response text.
+        
+        Providers override this to send the prompt without an image, which
+        avoids the image tokens on vision models. The default sends a blank
+        1x1 image through analyze_image.
+        
+        Args:
+            prompt: Prompt for the AI
+            
+        Returns:
+            Dictionary with the response text under 'analysis', None on failure
+        """
+        return self.analyze_image(_BLANK_IMAGE_B64, user_prompt=prompt)
+    
+    async def aanalyze_text(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Send a text-only prompt asynchronously.
+        
+        Args:
+            prompt: Prompt for the AI
+            
+        Returns:
+            Dictionary with the response text under 'analysis', None on failure
+        """
+        # Not asyncio.to_thread, as in aanalyze_image
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.analyze_text, prompt))
+    
+    def stream_analysis(self, image_b64: Optional[str], user_prompt: Optional[str] = None) -> Optional[Iterator[str]]:
+        """
+        Stream the raw response text as it is generated.
+        
+        Providers that support streamed responses override this; the default
+        returns None so callers fall back to analyze_image.
+        
+        Args:
+            image_b64: Base64-encoded image string, or None for a text-only request
+            user_prompt: Optional custom user prompt
+            
+        Returns:
+            Iterator of response text chunks, or None if streaming is not available
+        """
+        return None
@@ -684,36 +684,43 @@ class CatalogDatabase:
                         elif code_upper == "CE3.3.5":
                             all_keywords.append(f"Genre{delimiter}Experimental")
 
-        # Now insert or link keywords
-        for kw in all_keywords:
-            if not kw.strip():
-                continue
-
-            cursor.execute("SELECT id_local, id_global FROM AgLibraryKeyword WHERE name = ?", (kw,))
-            row = cursor.fetchone()
+        # Now insert or link keywords, each distinct keyword once
+        names = list(dict.fromkeys(kw for kw in all_keywords if kw.strip()))
+        if not names:
+            return
 
-            if row is None:
+        # Look up the ids of all the keywords with one query; the lowest id wins
+        # when several keywords share a name
+        keyword_ids = {}
+        cursor.execute(
+            f"SELECT name, id_local FROM AgLibraryKeyword WHERE name IN ({','.join('?' * len(names))}) ORDER BY id_local",
+            names
+        )
+        for name, keyword_id in cursor.fetchall():
+            keyword_ids.setdefault(name, keyword_id)
+
+        for kw in names:
+            if kw not in keyword_ids:
                 # Insert new keyword
                 keyword_global_id = str(uuid.uuid4()).replace('-', '').upper()
                 cursor.execute(
                     "INSERT INTO AgLibraryKeyword (name, lc_name, includeOnExport, id_global) VALUES (?, ?, ?, ?)",
                     (kw, kw.lower(), 1, keyword_global_id)
                 )
-                keyword_id = cursor.lastrowid
-                logger.debug(f"Inserted new keyword '{kw}' with id {keyword_id}")
-            else:
-                keyword_id = row[0]
-
-            # Link the keyword to the image if not already linked
-            cursor.execute(
-                "SELECT 1 FROM AgLibraryKeywordImage WHERE image = ? AND tag = ?",
+                keyword_ids[kw] = cursor.lastrowid
+                logger.debug(f"Inserted new keyword '{kw}' with id {keyword_ids[kw]}")
+
+        # Link the keywords to the image if not already linked, in one statement
+        cursor.execute("SELECT tag FROM AgLibraryKeywordImage WHERE image = ?", (image_id,))
+        linked = {row[0] for row in cursor.fetchall()}
+        cursor.executemany(
+            "INSERT INTO AgLibraryKeywordImage (image, tag) VALUES (?, ?)",
+            [
                 (image_id, keyword_id)
-            )
-            if cursor.fetchone() is None:
-                cursor.execute(
-                    "INSERT INTO AgLibraryKeywordImage (image, tag) VALUES (?, ?)",
-                    (image_id, keyword_id)
-                )
+                for keyword_id in dict.fromkeys(keyword_ids[kw] for kw in names)
+                if keyword_id not in linked
+            ]
+        )
 
     def _apply_aesthetic_score(self, cursor, image_id: int, aesthetic_score: float):
         """
@@ -7,7 +7,7 @@ import requests
 from typing import Dict, Any, Optional
 
 from .config import AppConfig, ClaudeConfig
-from .ai_providers import AiProvider
+from .ai_providers import AiProvider, RateLimitError
 from .logging_setup import get_logger
 
 logger = get_logger(__name__)
@@ -55,6 +55,31 @@ class ClaudeProvider(AiProvider):
             return self._call_claude_api(image_b64, user_prompt)
             
         return self.call_with_retries(make_request)
+    
+    def analyze_text(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Send a text-only prompt to Claude, without an image.
+        
+        Args:
+            prompt: Prompt for the AI
+            
+        Returns:
+            Dictionary with the response text under 'analysis', None on failure
+        """
+        return self.call_with_retries(lambda: self._call_claude_text(prompt))
+    
+    def _build_headers(self) -> Dict[str, str]:
+        """
+        Build the HTTP headers for a Claude API request.
+        
+        Returns:
+            Dictionary of request headers
+        """
+        return {
+            "x-api-key": self.api_key,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json"
+        }
         
     def _call_claude_api(self, img_b64: str, user_prompt: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
@@ -67,11 +92,7 @@ class ClaudeProvider(AiProvider):
         Returns:
             Dictionary with analysis results if successful, None otherwise
         """
-        headers = {
-            "x-api-key": self.api_key,
-            "anthropic-version": "2023-06-01",
-            "content-type": "application/json"
-        }
+        headers = self._build_headers()
     
         # Make sure the base64 doesn't have the prefix if it's included
         if img_b64.startswith("data:image"):
@@ -150,3 +171,48 @@ When analyzing images, pay special attention to:
         except Exception as e:
             logger.error(f"Unexpected error calling Claude API: {str(e)}")
             return None
+    
+    def _call_claude_text(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Call the Claude API with a text-only prompt.
+        
+        Args:
+            prompt: Prompt for the AI
+            
+        Returns:
+            Dictionary with the response text under 'analysis', None on failure
+        """
+        payload = {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [{"type": "text", "text": prompt}]
+                }
+            ],
+            "max_tokens": 4000,
+            "stream": False
+        }
+        
+        try:
+            response = requests.post(self.api_url, json=payload, headers=self._build_headers(), timeout=30)
+            self.raise_for_rate_limit(response)
+            response.raise_for_status()
+            result = response.json()
+            
+            response_text = result.get("content", [{}])[0].get("text", "")
+            return {"analysis": response_text} if response_text else None
+            
+        except RateLimitError:
+            raise
+        except requests.RequestException as e:
+            logger.error(f"Claude API network error: {str(e)}")
+            if hasattr(e, 'response') and hasattr(e.response, 'text'):
+                logger.error(f"Response details: {e.response.text}")
+            return None
+        except json.JSONDecodeError as e:
+            logger.error(f"Claude API JSON parsing error: {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error calling Claude API: {str(e)}")
+            return None
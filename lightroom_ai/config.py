@@ -79,6 +79,14 @@ class AppConfig:
     use_llm_grouping: bool = False
     use_llm_clustering: bool = False
     purge_unused_keywords: bool = False
+    llm_batch_target_tokens: int = 3000  # Approximate prompt token budget per LLM keyword batch
+    parse_in_processes: bool = False  # Parse LLM responses and run large fallback clustering in worker processes
+    llm_cache_file: Optional[str] = None  # SQLite file caching LLM clustering results across runs
+    llm_cache_ttl: int = 86400  # Seconds a cached LLM clustering result stays valid
+    coalesce_batches: bool = False  # Cluster several keyword batches per AI provider call
+    coalesce_group_size: int = 4  # Number of batches sent together when coalescing
+    create_catalog_indexes: bool = False  # Add indexes used by keyword consolidation to the catalog
+    purge_drop_indexes: bool = False  # Drop AgLibraryKeyword indexes during the purge and rebuild them after
 
 
 def _substitute_env_vars(value: Any) -> Any:
@@ -4,35 +4,948 @@ This module extracts keywords from a Lightroom catalog, clusters them using AI,
 and converts them into hierarchical keywords.
 """
 
+import os
 import sqlite3
+import asyncio
 import json
 import base64
 import re
+import sys
 import uuid
 import difflib
-from typing import List, Dict, Set, Tuple, Optional, Any
-from collections import defaultdict
+import io
+from array import array
+from bisect import bisect_right
+from typing import List, Dict, Set, Tuple, Optional, Any, Callable, Iterable, Iterator, Sequence
+from collections import defaultdict, OrderedDict, Counter
 import logging
+import random
 import time
 from tqdm import tqdm
 import concurrent.futures
+import multiprocessing
 from threading import Lock
 from functools import lru_cache
 
 from .config import AppConfig
-from .ai_providers import AiProvider
+from .ai_providers import AiProvider, RateLimitError
 from .utils import get_logger, extract_json
+from .llm_cache import LLMCache
+
+try:
+    # orjson parses large LLM responses several times faster; its
+    # JSONDecodeError subclasses json.JSONDecodeError, so handlers stay the same
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    # rapidfuzz computes similarity ratios in C, far faster than difflib
+    from rapidfuzz import fuzz as _fuzz, process as _fuzz_process
+except ImportError:
+    _fuzz = None
+    _fuzz_process = None
 
 
 WHITESPACE_PATTERN = re.compile(r'\s+')
 SPECIAL_CHARS_PATTERN = re.compile(r'[^\w\s-]', flags=re.UNICODE)
 
+# Finds where embedded JSON values end in LLM responses
+_JSON_DECODER = json.JSONDecoder()
+
+# Most host parameters bound in one catalog statement, below SQLite's old 999 limit
+_SQLITE_MAX_VARIABLES = 900
+
+# INSERT ... RETURNING hands back the new keyword ids on SQLite 3.35 and later
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Keywords inserted by one multi-row INSERT ... RETURNING statement
+_KEYWORD_INSERT_ROWS = 100
+
+# Indexes for the keyword joins, relationship lookups and purge deletes, created
+# when create_catalog_indexes is set: (index name, table, indexed columns)
+_CATALOG_INDEXES = [
+    ("idx_lrai_keywordimage_tag", "AgLibraryKeywordImage", "tag"),
+    ("idx_lrai_keywordtreerelation_child_parent", "AgLibraryKeywordTreeRelation", "keywordID, parentID"),
+    ("idx_lrai_keywordtreerelation_parent", "AgLibraryKeywordTreeRelation", "parentID"),
+    ("idx_lrai_keywordtree_keyword", "AgLibraryKeywordTree", "keywordID"),
+]
+
+# Fallback clustering is only split across worker processes above this many keywords
+_PARALLEL_FALLBACK_MIN_KEYWORDS = 5000
+
+# Bump when the clustering prompt changes so cached responses are not reused
+_CLUSTERING_PROMPT_VERSION = 1
+
 logger = get_logger(__name__)
 
+
+def _clean_keyword(keyword: str) -> str:
+    """
+    Perform basic cleaning on a keyword with precompiled regex patterns.
+    
+    Kept at module level so that whole keyword sets can be cleaned with a
+    single map() call instead of a per-keyword method dispatch.
+    
+    Args:
+        keyword: Original keyword
+        
+    Returns:
+        Cleaned keyword, or an empty string if nothing useful remains
+    """
+    if not keyword:
+        return ""
+    
+    # Convert to lowercase and strip whitespace
+    cleaned = keyword.lower().strip()
+    
+    # Remove leading/trailing punctuation
+    cleaned = cleaned.strip('.,;:!?-_"\'')
+    
+    # Replace multiple spaces with a single space using precompiled pattern.
+    # Every whitespace character other than a plain space is non-printable, so
+    # the substitution, which dominates cleaning, only runs when it would
+    # change something.
+    if '  ' in cleaned or not cleaned.isprintable():
+        cleaned = WHITESPACE_PATTERN.sub(' ', cleaned)
+    
+    # Remove special characters except spaces and hyphens using precompiled pattern.
+    # A str.translate deletion table measured slower than this substitution
+    # and would only cover ASCII, while the pattern follows Unicode \w and \s.
+    cleaned = SPECIAL_CHARS_PATTERN.sub('', cleaned)
+    
+    # Skip very short words (except common words like "a" and "i")
+    if len(cleaned) <= 1 and cleaned not in ['a', 'i']:
+        return ""
+        
+    return cleaned
+
+
+def _plural_variants(keyword: str) -> frozenset:
+    """
+    Build the plural forms that _are_keywords_similar treats as equivalent.
+    
+    Args:
+        keyword: Cleaned keyword
+        
+    Returns:
+        Frozenset of the keyword's "s", "es" and "y" -> "ies" plural forms
+    """
+    variants = {keyword + 's', keyword + 'es'}
+    if keyword.endswith('y'):
+        variants.add(keyword[:-1] + 'ies')
+    return frozenset(variants)
+
+
+def _trigrams(keyword: str) -> Set[str]:
+    """
+    Collect the distinct 3-character substrings of a keyword.
+    
+    Args:
+        keyword: Cleaned keyword
+        
+    Returns:
+        Set of the keyword's trigrams, empty for keywords under 3 characters
+    """
+    return {keyword[i:i + 3] for i in range(len(keyword) - 2)}
+
+
+def _trigram_free_length(similarity_threshold: float) -> Optional[int]:
+    """
+    Find the longest pair of keywords that can be similar without sharing a trigram.
+    
+    The matching blocks behind a similarity ratio are separated by unmatched
+    characters, so with M matched characters split into blocks of at most 2,
+    the combined length of the pair is at least 2.5 * M - 1. Together with
+    2 * M >= threshold * combined length, a pair without a common trigram can
+    only reach the threshold when its combined length is at most
+    1 / (1.25 * threshold - 1).
+    
+    Args:
+        similarity_threshold: Threshold for considering keywords similar
+        
+    Returns:
+        Longest combined length of such a pair, or None when the threshold is
+        too low to bound it
+    """
+    if similarity_threshold <= 0.8:
+        return None
+    return int(1 / (1.25 * similarity_threshold - 1) + 1e-9)
+
+
+@lru_cache(maxsize=65536)
+def _char_counts(keyword: str) -> Counter:
+    """
+    Count the characters of a keyword, once per keyword rather than once per pair.
+    
+    Args:
+        keyword: Cleaned keyword
+        
+    Returns:
+        Counter of the keyword's characters
+    """
+    return Counter(keyword)
+
+
+def _quick_ratio(keyword1: str, keyword2: str) -> float:
+    """
+    Compute difflib's quick_ratio() upper bound from cached character counts.
+    
+    Gives the same value as SequenceMatcher(None, keyword1, keyword2).quick_ratio()
+    without building a matcher, whose setup indexes every character of keyword2.
+    
+    Args:
+        keyword1: First keyword
+        keyword2: Second keyword
+        
+    Returns:
+        Upper bound on the similarity ratio of the two keywords
+    """
+    counts1 = _char_counts(keyword1)
+    counts2 = _char_counts(keyword2)
+    if len(counts1) > len(counts2):
+        counts1, counts2 = counts2, counts1
+    
+    matches = 0
+    for char, count in counts1.items():
+        other_count = counts2.get(char)
+        if other_count:
+            matches += count if count < other_count else other_count
+    return 2.0 * matches / (len(keyword1) + len(keyword2))
+
+
+def _ratio_at_least(keyword1: str, keyword2: str, threshold: float) -> bool:
+    """
+    Check whether the difflib similarity ratio of two keywords reaches a threshold.
+    
+    Args:
+        keyword1: First keyword
+        keyword2: Second keyword
+        threshold: Minimum similarity ratio
+        
+    Returns:
+        True if SequenceMatcher(None, keyword1, keyword2).ratio() >= threshold
+    """
+    # The ratio is the most expensive operation, so rule out most pairs first with
+    # the cheap upper bound on the ratio, computed from cached character counts
+    # before any matcher is built
+    if _quick_ratio(keyword1, keyword2) < threshold:
+        return False
+    return difflib.SequenceMatcher(None, keyword1, keyword2).ratio() >= threshold
+
+
+# Keyword patterns used to categorize keywords when AI clustering fails.
+# Categories are tried in this order and the first one that matches wins.
+_FALLBACK_CATEGORIES = {
+    "People": [
+        "person", "people", "man", "woman", "child", "family", "portrait", "face", 
+        "boy", "girl", "baby", "adult", "teen", "senior", "crowd", "group", "couple",
+        "wedding", "bride", "groom", "model", "self-portrait", "selfie"
+    ],
+    "Location": [
+        "city", "town", "country", "mountain", "beach", "landscape", "urban", "rural", "street",
+        "park", "forest", "ocean", "sea", "lake", "river", "desert", "jungle", "waterfall",
+        "building", "architecture", "home", "house", "apartment", "indoor", "outdoor", "garden",
+        "field", "farm", "village", "downtown", "suburb", "highway", "road", "path", "trail"
+    ],
+    "Time": [
+        "morning", "evening", "night", "sunset", "sunrise", "dusk", "dawn", "day",
+        "afternoon", "noon", "midnight", "twilight", "hour", "minute", "second",
+        "winter", "summer", "spring", "fall", "autumn", "season", "holiday", "vacation",
+        "weekend", "weekday", "year", "month", "week", "date", "birthday", "anniversary"
+    ],
+    "Color": [
+        "red", "blue", "green", "yellow", "black", "white", "orange", "purple", "pink", "color",
+        "brown", "gray", "grey", "silver", "gold", "bronze", "copper", "turquoise", "teal",
+        "magenta", "cyan", "indigo", "violet", "maroon", "navy", "olive", "lime", "aqua",
+        "pastel", "neon", "bright", "dark", "light", "saturated", "desaturated", "monochrome",
+        "colorful", "vibrant", "muted", "tone", "hue", "shade", "tint"
+    ],
+    "Composition": [
+        "composition", "frame", "rule of thirds", "symmetry", "pattern", "texture", "depth",
+        "foreground", "background", "middle ground", "leading lines", "diagonal", "horizontal",
+        "vertical", "perspective", "angle", "viewpoint", "wide", "narrow", "panorama", "square",
+        "rectangle", "crop", "aspect ratio", "golden ratio", "balance", "negative space",
+        "minimalist", "busy", "simple", "complex", "layered", "flat", "geometric"
+    ],
+    "Lighting": [
+        "light", "shadow", "contrast", "bright", "dark", "silhouette", "backlight",
+        "highlight", "lowlight", "rim light", "key light", "fill light", "natural light",
+        "artificial light", "flash", "strobe", "soft light", "hard light", "diffused",
+        "reflection", "refraction", "specular", "ambient", "mood lighting", "dramatic",
+        "high key", "low key", "exposure", "overexposed", "underexposed", "glow", "beam"
+    ],
+    "Technique": [
+        "long exposure", "macro", "bokeh", "hdr", "panorama", "focus", "depth of field",
+        "shallow depth of field", "deep depth of field", "selective focus", "tilt-shift",
+        "zoom", "telephoto", "wide angle", "fisheye", "prime lens", "zoom lens", "filter",
+        "black and white", "monochrome", "sepia", "vintage", "retro", "film", "digital",
+        "raw", "jpeg", "composite", "double exposure", "multiple exposure", "time-lapse",
+        "slow motion", "high speed", "panning", "handheld", "tripod", "stabilized"
+    ],
+    "Subject": [
+        "animal", "nature", "architecture", "food", "plant", "flower", "tree", "building",
+        "wildlife", "pet", "dog", "cat", "bird", "fish", "insect", "reptile", "mammal",
+        "landscape", "seascape", "cityscape", "still life", "product", "vehicle", "car",
+        "boat", "plane", "train", "bicycle", "motorcycle", "sports", "action", "event",
+        "concert", "performance", "art", "sculpture", "painting", "graffiti", "street art"
+    ],
+    "Mood": [
+        "happy", "sad", "dramatic", "peaceful", "moody", "calm", "energetic", "emotional",
+        "joyful", "melancholic", "nostalgic", "romantic", "mysterious", "eerie", "scary",
+        "tense", "relaxed", "serene", "chaotic", "orderly", "playful", "serious", "formal",
+        "casual", "intimate", "distant", "warm", "cool", "harsh", "soft", "dreamy", "surreal",
+        "realistic", "fantasy", "whimsical", "somber", "uplifting", "inspiring", "depressing"
+    ],
+    "Style": [
+        "vintage", "modern", "minimalist", "abstract", "documentary", "fine art", "commercial",
+        "photojournalism", "fashion", "portrait", "landscape", "street", "architectural",
+        "product", "food", "travel", "sports", "wildlife", "macro", "night", "long exposure",
+        "black and white", "color", "HDR", "panoramic", "aerial", "underwater", "infrared",
+        "tilt-shift", "lomography", "polaroid", "instant", "film", "digital", "smartphone"
+    ],
+    "Technical": [
+        "aperture", "shutter speed", "iso", "exposure", "white balance", "focus", "blur",
+        "sharp", "soft", "noise", "grain", "resolution", "megapixel", "raw", "jpeg", "tiff",
+        "compression", "bit depth", "dynamic range", "histogram", "clipping", "bracketing",
+        "metering", "spot metering", "matrix metering", "center-weighted", "manual", "auto",
+        "program", "priority", "bulb", "continuous", "single shot", "burst", "timer", "remote"
+    ]
+}
+
+_FALLBACK_CATEGORY_NAMES = list(_FALLBACK_CATEGORIES)
+
+
+def _first_category_index(pairs: Iterator[Tuple[str, int]]) -> Dict[str, int]:
+    """
+    Map each key to the first fallback category index it appears with.
+    
+    Args:
+        pairs: (key, category index) pairs in category order
+        
+    Returns:
+        Dictionary mapping keys to their lowest category index
+    """
+    index = {}
+    for key, category_index in pairs:
+        index.setdefault(key, category_index)
+    return index
+
+
+# Each distinct pattern with the first category it belongs to, in category order
+_FALLBACK_PATTERN_INDEX = _first_category_index(
+    (pattern, category_index)
+    for category_index, patterns in enumerate(_FALLBACK_CATEGORIES.values())
+    for pattern in patterns
+)
+
+# Every substring of every pattern, for the "keyword is part of a pattern" check
+_FALLBACK_SUBSTRING_INDEX = _first_category_index(
+    (pattern[start:end], category_index)
+    for pattern, category_index in _FALLBACK_PATTERN_INDEX.items()
+    for start in range(len(pattern) + 1)
+    for end in range(start, len(pattern) + 1)
+)
+
+# First 4 characters of each pattern of 4+ characters, for simple stemming
+_FALLBACK_PREFIX_INDEX = _first_category_index(
+    (pattern[:4], category_index)
+    for pattern, category_index in _FALLBACK_PATTERN_INDEX.items()
+    if len(pattern) >= 4
+)
+
+
+def _pattern_alternation(patterns: List[str]) -> str:
+    """
+    Build a regex alternation of literal patterns, nested by shared prefix.
+    
+    A flat alternation tries every pattern at every position. Nesting by the
+    next character lets the regex engine skip all patterns that cannot start
+    with the character being looked at. Patterns with different next characters
+    can never match at the same position, so the first matching pattern is still
+    the first in list order; where a pattern ends, the rest stay flat so that
+    order is kept.
+    
+    Args:
+        patterns: Distinct literal patterns in priority order
+        
+    Returns:
+        Regex source matching any of the patterns
+    """
+    if len(patterns) == 1:
+        return re.escape(patterns[0])
+    if '' in patterns:
+        return '(?:' + '|'.join(map(re.escape, patterns)) + ')'
+    
+    suffixes_by_char = defaultdict(list)
+    for pattern in patterns:
+        suffixes_by_char[pattern[0]].append(pattern[1:])
+    return '(?:' + '|'.join(
+        re.escape(char) + _pattern_alternation(suffixes)
+        for char, suffixes in suffixes_by_char.items()
+    ) + ')'
+
+
+# Finds every pattern occurring in a keyword in one scan. The lookahead reports a
+# match at each position, and since alternatives keep category order, the one
+# reported is the pattern with the earliest category starting there.
+_FALLBACK_PATTERN_RE = re.compile('(?=(' + _pattern_alternation(list(_FALLBACK_PATTERN_INDEX)) + '))')
+
+# Substring patterns of the taxonomy-based clusters, grouped by the taxonomy
+# section that must have matched for the clusters to be built. A keyword joins
+# every cluster with a pattern occurring in it.
+_TAXONOMY_CLUSTER_PATTERNS = {
+    "vs": {
+        "People": ["portrait", "people", "person", "group", "crowd"],
+        "Nature": ["nature", "landscape", "mountain", "forest", "water"],
+        "Architecture": ["architecture", "building", "structure", "urban", "city"],
+        "Objects": ["object", "item", "thing", "product"]
+    },
+    "ic": {
+        "Style": ["black & white", "monochrome", "high contrast", "low contrast"],
+        "Color": ["color", "warm", "cool", "saturated", "muted", "vibrant"],
+        "Technique": ["focus", "depth of field", "bokeh", "blur", "sharp"]
+    },
+    "ce": {
+        "Time": ["golden hour", "blue hour", "night", "sunset", "sunrise", "twilight"],
+        "Genre": ["documentary", "street photography", "fine art", "snapshot", "experimental"]
+    }
+}
+
+# One regex per cluster, so each keyword is checked against all of a cluster's
+# patterns in a single search
+_TAXONOMY_CLUSTER_RES = {
+    section: {category: re.compile(_pattern_alternation(patterns)) for category, patterns in categories.items()}
+    for section, categories in _TAXONOMY_CLUSTER_PATTERNS.items()
+}
+
+# Main categories the AI clusters keywords into when none are configured
+_DEFAULT_CLUSTERING_CATEGORIES = (
+    "People", "Nature", "Architecture", "Objects", "Lighting", "Color",
+    "Composition", "Style", "Technique", "Mood", "Time", "Location"
+)
+
+# Keyword patterns and the taxonomy codes they map to, as (mapping key,
+# get_taxonomy_flat_list key, {pattern: codes}) for each taxonomy section
+_TAXONOMY_KEYWORD_CODES = (
+    ("vs", "VS", {  # Visual Subject codes
+        "portrait": ["VS1.1"],
+        "people": ["VS1"],
+        "person": ["VS1"],
+        "group": ["VS1.2"],
+        "crowd": ["VS1.2"],
+        "nature": ["VS2.1"],
+        "landscape": ["VS2.1"],
+        "architecture": ["VS2.2.1"],
+        "building": ["VS2.2.1"],
+        "street": ["VS2.2.3"],
+        "urban": ["VS2.2.3"],
+        "plant": ["VS3.1.1"],
+        "flower": ["VS3.1.1"],
+        "animal": ["VS3.1.2"],
+        "wildlife": ["VS3.1.2"],
+        "object": ["VS3.2"],
+        "item": ["VS3.2"]
+    }),
+    ("ic", "IC", {  # Image Characteristics codes
+        "black & white": ["IC2.1.1"],
+        "bw": ["IC2.1.1"],
+        "b&w": ["IC2.1.1"],
+        "monochrome": ["IC2.1.2"],
+        "color": ["IC2.1.3"],
+        "high contrast": ["IC2.2.1"],
+        "contrasty": ["IC2.2.1"],
+        "low contrast": ["IC2.2.3"],
+        "soft contrast": ["IC2.2.3"],
+        "shallow depth": ["IC2.3.2"],
+        "bokeh": ["IC2.3.2"],
+        "deep depth": ["IC2.3.1"],
+        "sharp": ["IC2.3.1"],
+        "blur": ["IC2.3.4"],
+        "motion blur": ["IC2.3.4"],
+        "warm": ["IC3.1.1"],
+        "warm tone": ["IC3.1.1"],
+        "cool": ["IC3.1.2"],
+        "cool tone": ["IC3.1.2"],
+        "saturated": ["IC3.2.1"],
+        "vibrant": ["IC3.2.1"],
+        "muted": ["IC3.2.3"],
+        "desaturated": ["IC3.2.3"]
+    }),
+    ("ce", "CE", {  # Contextual Elements codes
+        "golden hour": ["CE1.2.3"],
+        "sunset": ["CE1.2.3"],
+        "sunrise": ["CE1.2.3"],
+        "blue hour": ["CE1.2.4"],
+        "twilight": ["CE1.2.4"],
+        "night": ["CE1.2.5"],
+        "dark": ["CE1.2.5"],
+        "documentary": ["CE3.3.1"],
+        "photojournalism": ["CE3.3.1"],
+        "street photography": ["CE3.3.2"],
+        "fine art": ["CE3.3.3"],
+        "artistic": ["CE3.3.3"],
+        "snapshot": ["CE3.3.4"],
+        "casual": ["CE3.3.4"],
+        "experimental": ["CE3.3.5"],
+        "abstract": ["CE3.3.5"]
+    })
+)
+
+
+@lru_cache(maxsize=1)
+def _valid_taxonomy_codes() -> Dict[str, frozenset]:
+    """
+    Collect the valid taxonomy codes of each section, once per process.
+    
+    Returns:
+        Dictionary mapping 'VS', 'IC' and 'CE' to frozensets of their codes
+    """
+    from .film_analysis import get_taxonomy_flat_list
+    
+    return {code_group: frozenset(codes) for code_group, codes in get_taxonomy_flat_list().items()}
+
+
+@lru_cache(maxsize=128)
+def _taxonomy_mapping(keywords: Tuple[str, ...]) -> Dict[str, Tuple[str, ...]]:
+    """
+    Map a batch of keywords to taxonomy codes.
+    
+    Memoized by batch, since the same keywords are mapped again for clustering
+    prompts, the taxonomy clusters and the hierarchy. The key keeps keyword
+    order, which decides the order of the codes.
+    
+    Args:
+        keywords: Keywords to map, in order
+        
+    Returns:
+        Dictionary mapping taxonomy sections to tuples of codes
+    """
+    taxonomy_codes = _valid_taxonomy_codes()
+    
+    # Search for each pattern once in all keywords joined by newlines, which
+    # no pattern contains, so every match lies within a single keyword
+    keywords_lower = [keyword.lower() for keyword in keywords]
+    text = '\n'.join(keywords_lower)
+    starts = []
+    offset = 0
+    for keyword_lower in keywords_lower:
+        starts.append(offset)
+        offset += len(keyword_lower) + 1
+    
+    taxonomy_mapping = {}
+    for section, code_group, patterns in _TAXONOMY_KEYWORD_CODES:
+        # Order the matches by the first keyword containing them, then by
+        # pattern order, so codes are added in keyword-by-keyword scan order
+        matches = []
+        for pattern_order, (kw, codes) in enumerate(patterns.items()):
+            position = text.find(kw)
+            if position >= 0:
+                matches.append((bisect_right(starts, position), pattern_order, codes))
+        
+        # Keep valid codes once each, in first-seen order, with set and dict
+        # lookups instead of scanning lists
+        valid_codes = taxonomy_codes[code_group]
+        taxonomy_mapping[section] = tuple(dict.fromkeys(
+            code for _, _, codes in sorted(matches) for code in codes if code in valid_codes
+        ))
+    
+    return taxonomy_mapping
+
+
+@lru_cache(maxsize=65536)
+def _fallback_category_index(keyword_lower: str) -> Optional[int]:
+    """
+    Find the first fallback category matching a keyword.
+    
+    A category matches if one of its patterns occurs in the keyword, the keyword
+    occurs in one of its patterns, or both share their first 4 characters.
+    Memoized because every failed clustering batch falls back over the full
+    keyword set, so the same keywords are categorized again and again.
+    
+    Args:
+        keyword_lower: Lowercased keyword
+        
+    Returns:
+        Index into _FALLBACK_CATEGORY_NAMES, or None if no category matches
+    """
+    candidates = [_FALLBACK_PATTERN_INDEX[match.group(1)] for match in _FALLBACK_PATTERN_RE.finditer(keyword_lower)]
+    
+    if keyword_lower in _FALLBACK_SUBSTRING_INDEX:
+        candidates.append(_FALLBACK_SUBSTRING_INDEX[keyword_lower])
+    
+    # Simple stemming: the first 4+ characters match
+    if len(keyword_lower) >= 4:
+        prefix_index = _FALLBACK_PREFIX_INDEX.get(keyword_lower[:4])
+        if prefix_index is not None:
+            candidates.append(prefix_index)
+    
+    return min(candidates) if candidates else None
+
+
+def _fallback_category_indexes(keywords_lower: List[str]) -> List[Optional[int]]:
+    """
+    Find the first fallback category for each keyword in a chunk.
+    
+    Defined at module level so chunks can be categorized in worker processes.
+    
+    Args:
+        keywords_lower: Lowercased keywords
+        
+    Returns:
+        Category index, or None, for each keyword in order
+    """
+    return [_fallback_category_index(keyword_lower) for keyword_lower in keywords_lower]
+
+
+@lru_cache(maxsize=1024)
+def _find_json_text(text: str, open_char: str) -> Optional[str]:
+    """
+    Locate the JSON array or object in an LLM response.
+    
+    Results are memoized by response text, so a response seen again (a retry
+    or an identical batch) skips the scanning. The located JSON text is
+    returned rather than the parsed value so that every caller gets its own
+    objects to modify.
+    
+    Args:
+        text: Response text from the LLM
+        open_char: '[' to look for an array, '{' to look for an object
+        
+    Returns:
+        Text that parses as JSON, or None if no JSON could be found
+    """
+    def parses(candidate: str) -> bool:
+        try:
+            _json_loads(candidate)
+            return True
+        except json.JSONDecodeError:
+            return False
+    
+    # First try direct JSON parsing
+    if parses(text):
+        return text
+    logger.debug("Direct JSON parsing failed, scanning for embedded JSON")
+    
+    # Take the first JSON value that parses from an opening bracket; this also
+    # finds JSON inside markdown code blocks or surrounded by explanatory text.
+    # raw_decode scans in C, handles brackets inside strings, and stops at the
+    # end of the value, so no separate bracket matching is needed.
+    start = text.find(open_char)
+    while start != -1:
+        try:
+            _, end = _JSON_DECODER.raw_decode(text, start)
+            return text[start:end]
+        except json.JSONDecodeError:
+            start = text.find(open_char, start + 1)
+    
+    logger.debug("No parseable JSON found in LLM response")
+    return None
+
+
+def _parse_json_text(text: str, open_char: str) -> Optional[Any]:
+    """
+    Locate and parse the JSON array or object in an LLM response.
+    
+    Defined at module level so it can be pickled and run in a worker process.
+    
+    Args:
+        text: Response text from the LLM
+        open_char: '[' to look for an array, '{' to look for an object
+        
+    Returns:
+        Parsed JSON value, or None if no JSON could be found
+    """
+    json_text = _find_json_text(text, open_char)
+    return _json_loads(json_text) if json_text is not None else None
+
+
+def _parse_json_stream(chunks: Iterable[str], open_char: str) -> Optional[Any]:
+    """
+    Parse the first JSON array or object from a streamed LLM response.
+    
+    The bracket depth is tracked across chunks as they arrive, so reading
+    stops as soon as the first balanced region closes and parses, instead of
+    waiting for and holding the whole response. If that region does not
+    parse, the rest of the stream is read and the full text is searched as
+    for a complete response.
+    
+    Args:
+        chunks: Response text chunks in order
+        open_char: '[' to look for an array, '{' to look for an object
+        
+    Returns:
+        Parsed JSON value, or None if no JSON could be found
+    """
+    close_char = ']' if open_char == '[' else '}'
+    buffer = io.StringIO()
+    offset = 0
+    start = -1
+    depth = 0
+    in_string = escaped = False
+    
+    for chunk in chunks:
+        buffer.write(chunk)
+        # Once the first candidate failed, just collect the rest of the text
+        if depth < 0:
+            continue
+        
+        index = 0
+        if start == -1:
+            index = chunk.find(open_char)
+            if index == -1:
+                offset += len(chunk)
+                continue
+            start = offset + index
+        
+        for i in range(index, len(chunk)):
+            char = chunk[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == open_char:
+                depth += 1
+            elif char == close_char:
+                depth -= 1
+                if depth == 0:
+                    candidate = buffer.getvalue()[start:offset + i + 1]
+                    try:
+                        value = _json_loads(candidate)
+                    except json.JSONDecodeError:
+                        depth = -1
+                        break
+                    # Stop reading; closing the stream releases the connection
+                    if hasattr(chunks, 'close'):
+                        chunks.close()
+                    return value
+        offset += len(chunk)
+    
+    return _parse_json_text(buffer.getvalue(), open_char)
+
+
+# Per-batch taxonomy section of the clustering prompt, filled in with str.format
+_CLUSTERING_PROMPT_TAXONOMY = """
+        
+        TAXONOMY INFORMATION:
+        These keywords map to the following taxonomy codes:
+        - Visual Subject (VS) codes: {vs}
+        - Image Characteristics (IC) codes: {ic}
+        - Contextual Elements (CE) codes: {ce}
+        
+"""
+
+
+@lru_cache(maxsize=32)
+def _clustering_prompt_template(categories: Tuple[str, ...]) -> Tuple[str, str]:
+    """
+    Build the invariant parts of the clustering prompt once per set of categories.
+    
+    Args:
+        categories: Main categories the AI should use
+        
+    Returns:
+        (header, footer) to place before the keywords and after the taxonomy section
+    """
+    header = """
+        You are a photography expert tasked with organizing keywords into a logical hierarchy.
+        
+        TASK:
+        Analyze these photography keywords and organize them into categories and subcategories.
+        
+        KEYWORDS:
+        """
+    
+    footer = f"""        INSTRUCTIONS:
+        1. Assign EVERY keyword to one of these main categories: {', '.join(categories)}
+        2. Create appropriate subcategories as needed
+        3. Every keyword MUST be assigned to a category - none should be left out
+        4. If a keyword doesn't fit any category well, use your best judgment
+        5. Distribute keywords evenly - don't put too many in one category
+        6. Be consistent with your categorization logic
+        7. Consolidate similar terms (e.g., "airplane", "aircraft", "plane" should all be represented by one term)
+        8. Use the taxonomy information to guide your categorization
+        
+        REQUIRED OUTPUT FORMAT:
+        Return ONLY a JSON object with this structure:
+        {{
+            "Category1": {{
+                "keywords": ["keyword1", "keyword2"],
+                "subcategories": {{
+                    "Subcategory1": {{
+                        "keywords": ["keyword3", "keyword4"]
+                    }}
+                }}
+            }},
+            "Category2": {{
+                "keywords": ["keyword5", "keyword6"]
+            }}
+        }}
+        
+        IMPORTANT:
+        - Include EVERY keyword from the provided list
+        - Use ONLY the main categories listed above
+        - Your response must be valid JSON that can be parsed directly
+        - Do not include any explanations or text outside the JSON structure
+        - Ensure no keyword appears in multiple categories
+        - Make sure all JSON keys and values are properly quoted
+        - Make sure to properly close all brackets and format as valid JSON
+        - Do not use markdown formatting or code blocks
+        """
+    
+    return header, footer
+
+
+def _delete_ids_in_chunks(cursor: sqlite3.Cursor, sql: str, ids: Sequence[int], binds_per_id: int = 1) -> None:
+    """
+    Run a DELETE over a list of ids, a chunk of ids per statement.
+    
+    Chunks are sized so no statement binds more than _SQLITE_MAX_VARIABLES
+    parameters, which older SQLite builds cap at 999.
+    
+    Args:
+        cursor: Database cursor
+        sql: DELETE statement with a "{0}" placeholder for each id list
+        ids: Ids to delete
+        binds_per_id: Number of "{0}" id lists in the statement
+    """
+    chunk_size = _SQLITE_MAX_VARIABLES // binds_per_id
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        cursor.execute(sql.format(','.join('?' * len(chunk))), chunk * binds_per_id)
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    """
+    Check whether an exception raised by an AI provider is an HTTP 429.
+    
+    Args:
+        error: Exception raised while calling the provider
+        
+    Returns:
+        True if the provider rejected the request for exceeding its rate limit
+    """
+    if isinstance(error, RateLimitError):
+        return True
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 429:
+        return True
+    return '429' in str(error) or 'rate limit' in str(error).lower()
+
+
+def _next_backoff(previous: float, initial: float = 1, maximum: float = 60) -> float:
+    """
+    Compute the next retry backoff with decorrelated jitter.
+    
+    Each wait is drawn uniformly between the initial backoff and three times
+    the previous wait, capped at maximum. Calls that fail together spread
+    their retries out instead of retrying in the same window.
+    
+    Args:
+        previous: The previous wait, or the initial backoff before the first retry
+        initial: Shortest wait in seconds
+        maximum: Longest wait in seconds
+        
+    Returns:
+        Number of seconds to wait
+    """
+    backoff = min(maximum, random.uniform(initial, previous * 3))
+    logger.info(f"Backing off for {backoff:.2f} seconds before retry")
+    return backoff
+
+
+class _ProviderCooldown:
+    """Rate-limit cooldown shared by every call to one AI provider."""
+    
+    def __init__(self):
+        """Initialize with no cooldown in effect."""
+        self._until = 0.0  # Monotonic time before which no call is sent
+        self._lock = Lock()
+    
+    def start(self, seconds: float) -> None:
+        """
+        Hold off every call for at least the given time from now.
+        
+        Args:
+            seconds: How long to hold off
+        """
+        with self._lock:
+            self._until = max(self._until, time.monotonic() + seconds)
+    
+    def start_for(self, error: Exception, backoff: float) -> None:
+        """
+        Start a cooldown after the provider rate-limited a call.
+        
+        Args:
+            error: The rate-limit error, whose retry_after is honoured if set
+            backoff: The caller's current backoff in seconds
+        """
+        seconds = max(backoff, getattr(error, 'retry_after', None) or 0)
+        logger.warning(f"LLM provider rate limit hit, pausing requests for {seconds:.2f} seconds")
+        self.start(seconds)
+    
+    def remaining(self) -> float:
+        """Return the seconds left in the current cooldown, or 0."""
+        with self._lock:
+            return max(0.0, self._until - time.monotonic())
+    
+    def wait(self) -> None:
+        """Block the calling thread until the cooldown has passed."""
+        remaining = self.remaining()
+        if remaining > 0:
+            time.sleep(remaining)
+    
+    async def async_wait(self) -> None:
+        """Wait until the cooldown has passed without blocking the event loop."""
+        remaining = self.remaining()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+
+class _ShardedLRU:
+    """LRU cache split into independently locked shards."""
+    
+    def __init__(self, capacity: int, shards: int = 8):
+        """
+        Initialize the cache.
+        
+        Args:
+            capacity: Total number of entries kept across all shards
+            shards: Number of shards, a power of two
+        """
+        self._mask = shards - 1
+        self._shard_capacity = max(1, -(-capacity // shards))
+        self._shards = [(OrderedDict(), Lock()) for _ in range(shards)]
+    
+    def get(self, key: Any) -> Optional[Any]:
+        """Return the cached value for key, or None if not cached."""
+        entries, lock = self._shards[hash(key) & self._mask]
+        with lock:
+            if key not in entries:
+                return None
+            entries.move_to_end(key)
+            return entries[key]
+    
+    def put(self, key: Any, value: Any) -> None:
+        """Store a value, evicting the least recently used entry of its shard."""
+        entries, lock = self._shards[hash(key) & self._mask]
+        with lock:
+            entries[key] = value
+            entries.move_to_end(key)
+            if len(entries) > self._shard_capacity:
+                entries.popitem(last=False)
+
+
 class RateLimitedLLM:
     """Class to handle LLM API calls with rate limiting and caching."""
     
-    def __init__(self, ai_provider, max_retries=3, initial_backoff=1, cache_size=100):
+    def __init__(self, ai_provider, max_retries=3, initial_backoff=1, cache_size=100, max_backoff=60,
+                 cooldown: Optional[_ProviderCooldown] = None):
         """
         Initialize the rate-limited LLM wrapper.
         
@@ -41,15 +954,38 @@ class RateLimitedLLM:
             max_retries: Maximum number of retries for failed calls
             initial_backoff: Initial backoff time in seconds
             cache_size: Size of the LRU cache for API results
+            max_backoff: Longest backoff between retries in seconds
+            cooldown: Rate-limit cooldown shared with other callers of the provider
         """
         self.ai_provider = ai_provider
         self.max_retries = max_retries
         self.initial_backoff = initial_backoff
-        self.process_batch = lru_cache(maxsize=cache_size)(self._process_batch_uncached)
+        self.max_backoff = max_backoff
+        self.cache_size = cache_size
+        
+        # LRU cache shared by the sync and async entry points, sharded so that
+        # lookups from different worker threads rarely wait on the same lock
+        self._cache = _ShardedLRU(cache_size)
         
-    def _process_batch_uncached(self, keywords_str):
+        # Pushed out whenever a call is rate-limited, so no batch calls the
+        # provider until it has passed
+        self._cooldown = cooldown or _ProviderCooldown()
+    
+    def _cache_get(self, key):
+        """Return the cached result for key, or None if not cached."""
+        return self._cache.get(key)
+    
+    def _cache_put(self, key, value):
+        """Store a result in the cache, evicting the least recently used entry."""
+        self._cache.put(key, value)
+    
+    def process_batch(self, keywords_str):
         """
-        Process a batch of keywords with the LLM.
+        Process a batch of keywords with the LLM, using cached results when available.
+        
+        Runs aprocess_batch on a private event loop, so retry backoff never
+        blocks on time.sleep. Must not be called from a running event loop;
+        use aprocess_batch there.
         
         Args:
             keywords_str: String representation of keywords to process
@@ -57,13 +993,35 @@ class RateLimitedLLM:
         Returns:
             Processed results from the LLM
         """
-        # Convert string to list (needed because cache keys must be hashable)
-        keywords = keywords_str.split('|||||')
+        return asyncio.run(self.aprocess_batch(keywords_str))
+    
+    async def aprocess_batch(self, keywords_str):
+        """
+        Asynchronous version of process_batch.
         
-        for attempt in range(self.max_retries):
-            try:
-                # Create a prompt for the LLM
-                prompt = f"""
+        Args:
+            keywords_str: String representation of keywords to process
+            
+        Returns:
+            Processed results from the LLM
+        """
+        result = self._cache_get(keywords_str)
+        if result is None:
+            result = await self._aprocess_batch_uncached(keywords_str)
+            self._cache_put(keywords_str, result)
+        return result
+    
+    def _build_prompt(self, keywords: List[str]) -> str:
+        """
+        Build the grouping prompt for a batch of keywords.
+        
+        Args:
+            keywords: Keywords to group
+            
+        Returns:
+            Prompt string for the LLM
+        """
+        return f"""
                 I have a list of photography keywords that need to be grouped by semantic similarity.
                 Group keywords that represent the same concept or are very similar.
                 
@@ -80,111 +1038,105 @@ class RateLimitedLLM:
                 
                 IMPORTANT: Return ONLY the JSON array with no additional text or explanation.
                 """
+    
+    def _parse_groups(self, response: Optional[Dict[str, Any]]) -> Optional[List[List[str]]]:
+        """
+        Extract the keyword groups from an LLM response.
+        
+        Args:
+            response: Response returned by the AI provider
+            
+        Returns:
+            List of non-empty keyword groups, or None if the response is unusable
+        """
+        if response and 'analysis' in response:
+            # Try to parse the JSON response using our improved parsing method
+            json_data = _parse_json_text(response['analysis'], '[')
+            
+            if json_data and isinstance(json_data, list):
+                # Filter out empty groups
+                valid_groups = [group for group in json_data if isinstance(group, list) and group]
                 
-                # Create a dummy image since our AI providers expect an image
-                dummy_image = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
-                
-                # Call the AI provider with the prompt and dummy image
-                response = self.ai_provider.analyze_image(dummy_image, user_prompt=prompt)
-                
-                if response and 'analysis' in response:
-                    # Try to extract JSON from the response
-                    analysis_text = response['analysis']
-                    
-                    # Try to parse the JSON response using our improved parsing method
-                    json_data = self._extract_json_array(analysis_text)
-                    
-                    if json_data and isinstance(json_data, list):
-                        # Filter out empty groups
-                        valid_groups = []
-                        for group in json_data:
-                            if isinstance(group, list) and len(group) > 0:
-                                valid_groups.append(group)
-                        
-                        if valid_groups:
-                            logger.info(f"LLM identified {len(valid_groups)} keyword groups")
-                            return valid_groups
-                
-                # If we get here, either no response or invalid format
-                logger.warning(f"LLM grouping attempt {attempt+1} failed, retrying...")
-                
-                # Exponential backoff with jitter
-                import random
-                backoff = self.initial_backoff * (2 ** attempt) * (0.5 + random.random())
-                logger.info(f"Backing off for {backoff:.2f} seconds before retry")
-                time.sleep(backoff)
-                
-            except Exception as e:
-                logger.error(f"Error in LLM keyword grouping (attempt {attempt+1}): {e}")
-                
-                # Exponential backoff with jitter
-                import random
-                backoff = self.initial_backoff * (2 ** attempt) * (0.5 + random.random())
-                logger.info(f"Backing off for {backoff:.2f} seconds before retry")
-                time.sleep(backoff)
+                if valid_groups:
+                    logger.info(f"LLM identified {len(valid_groups)} keyword groups")
+                    return valid_groups
         
-        # If we get here, LLM grouping failed after all attempts
-        logger.warning("LLM keyword grouping failed after all retries")
-        return []
+        return None
     
-    def _extract_json_array(self, text: str) -> Optional[List]:
+    def _backoff(self, previous: float) -> float:
         """
-        Extract a JSON array from text with improved handling for array responses.
+        Compute the next backoff for a batch, see _next_backoff.
         
         Args:
-            text: Text containing a JSON array
+            previous: The previous wait for this batch, or initial_backoff before the first retry
             
         Returns:
-            Parsed JSON array or None if parsing fails
+            Number of seconds to wait
         """
-        try:
-            # First try direct JSON parsing
-            return json.loads(text)
-        except json.JSONDecodeError:
-            logger.debug("Direct JSON parsing failed, trying alternative methods")
-            
-            # Try to extract JSON array with regex
-            # Look for array pattern starting with [ and ending with ]
-            array_match = re.search(r'\[\s*\[.+\]\s*\]', text, re.DOTALL)
-            if array_match:
-                try:
-                    array_text = array_match.group(0)
-                    logger.debug(f"Found potential JSON array: {array_text[:100]}...")
-                    return json.loads(array_text)
-                except json.JSONDecodeError:
-                    logger.debug("Failed to parse JSON array with regex match")
-            
-            # Try to find the array between code blocks
-            code_block_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text, re.DOTALL)
-            if code_block_match:
-                try:
-                    code_text = code_block_match.group(1)
-                    return json.loads(code_text)
-                except json.JSONDecodeError:
-                    logger.debug("Failed to parse JSON from code block")
-            
-            # Try to find array with bracket counting
+        return _next_backoff(previous, self.initial_backoff, self.max_backoff)
+    
+    async def _ainvoke_ai(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Call the AI provider asynchronously with a text prompt.
+        
+        Args:
+            prompt: Prompt for the AI
+            
+        Returns:
+            AI response as a dictionary
+        """
+        return await self.ai_provider.aanalyze_text(prompt)
+    
+    async def _aprocess_batch_uncached(self, keywords_str):
+        """
+        Process a batch of keywords with the LLM, retrying with backoff.
+        
+        Backoff waits use asyncio.sleep so other batches keep running while
+        this one is retrying.
+        
+        Args:
+            keywords_str: String representation of keywords to process
+            
+        Returns:
+            Processed results from the LLM
+        """
+        # Convert string to list (needed because cache keys must be hashable)
+        keywords = keywords_str.split('|||||')
+        
+        # Create the prompt once and reuse it across retries
+        prompt = self._build_prompt(keywords)
+        
+        backoff = self.initial_backoff
+        for attempt in range(self.max_retries):
+            # Don't send a request the provider would reject while rate-limited
+            await self._cooldown.async_wait()
+            
             try:
-                logger.debug(f"Attempting to parse JSON array: {text[:100]}...")
-                # Find the first opening bracket
-                start_idx = text.find('[')
-                if start_idx != -1:
-                    # Count brackets to find the matching closing bracket
-                    bracket_count = 1
-                    for i in range(start_idx + 1, len(text)):
-                        if text[i] == '[':
-                            bracket_count += 1
-                        elif text[i] == ']':
-                            bracket_count -= 1
-                            if bracket_count == 0:
-                                # Found the matching closing bracket
-                                json_text = text[start_idx:i+1]
-                                return json.loads(json_text)
-                logger.debug("Failed to parse JSON array with brackets")
+                response = await self._ainvoke_ai(prompt)
+                
+                valid_groups = self._parse_groups(response)
+                if valid_groups:
+                    return valid_groups
+                
+                # If we get here, either no response or invalid format
+                logger.warning(f"LLM grouping attempt {attempt+1} failed, retrying...")
+                
             except Exception as e:
-                logger.debug(f"Failed to parse JSON array with brackets: {e}")
+                logger.error(f"Error in LLM keyword grouping (attempt {attempt+1}): {e}")
+                if _is_rate_limit_error(e):
+                    # The limit applies to every call, so they all back off
+                    backoff = self._backoff(backoff)
+                    self._cooldown.start_for(e, backoff)
+                    continue
             
-            return None
+            # No wait after the last attempt, the caller falls back right away
+            if attempt < self.max_retries - 1:
+                backoff = self._backoff(backoff)
+                await asyncio.sleep(backoff)
+        
+        # If we get here, LLM grouping failed after all attempts
+        logger.warning("LLM keyword grouping failed after all retries")
+        return []
 
 
 class KeywordConsolidator:
@@ -210,30 +1162,139 @@ class KeywordConsolidator:
             self.ai_provider.config.model = model_override
             
         self.db_conn = None
+        self._table_cache = {}  # Whether each probed catalog table exists
+        self._keyword_preload = None  # (connection, data_version, future) of the background keyword read
         self.keywords = set()
         self.cleaned_keywords = {}  # Maps original keywords to cleaned versions
         self.keyword_clusters = {}
         self.keyword_hierarchy = {}
         self.used_keywords = set()  # Track keywords that are actually used in images
+        self.keyword_usage = Counter()  # Number of images tagged with each keyword
+        self._cleaned_usage = Counter()  # Number of images tagged per cleaned keyword form
         self.drop_all_keywords = False
         
-        # For thread safety
-        self.lock = Lock()
+        # Resolved once, and interned, rather than looked up in the hierarchy loops
+        self.keyword_delimiter = sys.intern(getattr(config, 'keyword_delimiter', '|'))
+        
+        # Shared by every LLM call, so a rate-limit response holds all of them off
+        self._cooldown = _ProviderCooldown()
         
         # Get max_workers from config or default to 1
         self.max_workers = getattr(config, 'max_workers', 1)
         logger.info(f"Initializing KeywordConsolidator with {self.max_workers} workers")
         
+        # One pool shared by all LLM batch work and the local fallbacks it starts
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, self.max_workers))
+        self._pending_futures = set()  # Futures submitted to _executor that have not finished
+        
+        # Optionally parse LLM responses, and categorize large fallback keyword
+        # lists, in worker processes so that CPU-bound work is not serialized by
+        # the GIL. Spawned rather than forked, since forking a process that runs
+        # threads is unsafe.
+        self._parse_pool = None
+        if getattr(config, 'parse_in_processes', False):
+            self._parse_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max(1, self.max_workers),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        
+        # Optional cache of clustering responses that persists across runs
+        cache_file = getattr(config, 'llm_cache_file', None)
+        self._llm_cache = LLMCache(cache_file, ttl=getattr(config, 'llm_cache_ttl', 86400)) if cache_file else None
+    
+    @property
+    def cleaned_keywords(self) -> Dict[str, str]:
+        """Mapping of original keywords to their cleaned versions."""
+        return self._cleaned_keywords
+    
+    @cleaned_keywords.setter
+    def cleaned_keywords(self, mapping: Dict[str, str]) -> None:
+        """
+        Replace the cleaned keyword mapping.
+        
+        The distinct cleaned keywords are needed by clustering, validation and
+        hierarchy building, so they are computed once here rather than on each
+        use. Assign a new mapping instead of modifying this one in place.
+        
+        Args:
+            mapping: Mapping of original keywords to cleaned versions
+        """
+        self._cleaned_keywords = mapping
+        self._unique_cleaned = frozenset(mapping.values())
+        
     def connect_to_db(self) -> None:
-        """Connect to the Lightroom catalog database."""
+        """
+        Connect to the Lightroom catalog database.
+        
+        Like CatalogDatabase, this switches the catalog to WAL journaling with
+        synchronous=NORMAL, so each commit costs one WAL append instead of
+        rewriting a rollback journal. SQLite keeps the write-ahead log in
+        "<catalog>-wal" and "<catalog>-shm" files next to the catalog until the
+        last connection checkpoints and closes. The journal mode is left alone
+        while Lightroom has the catalog open, as Lightroom holds it locked.
+        """
         try:
-            self.db_conn = sqlite3.connect(self.catalog_path)
+            # Transactions are begun and ended explicitly around the catalog writes
+            self.db_conn = sqlite3.connect(self.catalog_path, isolation_level=None)
             self.db_conn.row_factory = sqlite3.Row
+            self._table_cache = {}
+            self.db_conn.execute(f"PRAGMA busy_timeout={getattr(self.config, 'db_busy_timeout', 30000)}")
+            if os.path.exists(f"{self.catalog_path}.lock"):
+                logger.warning("Lightroom appears to have the catalog open; close it before updating keywords")
+            else:
+                self.db_conn.execute("PRAGMA journal_mode=WAL")
+                self.db_conn.execute("PRAGMA synchronous=NORMAL")
+            self.db_conn.execute("PRAGMA temp_store=MEMORY")
+            # 64MB page cache (negative values are in KiB) so the keyword joins stay in memory
+            self.db_conn.execute("PRAGMA cache_size = -65536")
+            # Read up to 256MB of the catalog through a memory map instead of read() calls
+            self.db_conn.execute("PRAGMA mmap_size = 268435456")
+            if getattr(self.config, 'create_catalog_indexes', False):
+                self._ensure_catalog_indexes()
             logger.info(f"Connected to catalog database: {self.catalog_path}")
         except sqlite3.Error as e:
             logger.error(f"Failed to connect to catalog database: {e}")
             raise RuntimeError(f"Failed to connect to catalog database: {e}")
     
+    def _table_exists(self, table: str) -> bool:
+        """
+        Check whether a table exists in the catalog.
+        
+        The catalog schema does not change while consolidating, so each table
+        is looked up in sqlite_master once per connection.
+        
+        Args:
+            table: Table name
+            
+        Returns:
+            True if the table exists, False otherwise
+        """
+        if table not in self._table_cache:
+            row = self.db_conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+            ).fetchone()
+            self._table_cache[table] = row is not None
+        return self._table_cache[table]
+    
+    def _ensure_catalog_indexes(self) -> None:
+        """
+        Create the indexes keyword consolidation queries rely on, if missing.
+        
+        The stock catalog schema may lack them, leaving the keyword joins and
+        purge deletes to scan whole tables. Only tables present in the catalog
+        are indexed, and the indexed tables are analyzed afterwards so the query
+        planner has statistics for the new indexes.
+        """
+        indexed_tables = []
+        for index_name, table, columns in _CATALOG_INDEXES:
+            if self._table_exists(table):
+                self.db_conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})")
+                indexed_tables.append(table)
+        
+        for table in dict.fromkeys(indexed_tables):
+            self.db_conn.execute(f"ANALYZE {table}")
+        logger.info(f"Ensured keyword indexes on {len(set(indexed_tables))} catalog tables")
+    
     def extract_keywords(self) -> Set[str]:
         """
         Extract all keywords from the Lightroom catalog efficiently using a single query.
@@ -247,29 +1308,26 @@ class KeywordConsolidator:
         try:
             cursor = self.db_conn.cursor()
         
-            # Use a single query with LEFT JOIN to get both all keywords and used keywords
+            # Use a single aggregated query to get all keywords with their image counts
             cursor.execute("""
-                SELECT k.name, 
-                       COUNT(ki.tag) > 0 AS is_used
+                SELECT k.name, COUNT(ki.image) AS usage_count
                 FROM AgLibraryKeyword k
                 LEFT JOIN AgLibraryKeywordImage ki ON k.id_local = ki.tag
-                GROUP BY k.name
+                GROUP BY k.id_local
             """)
-            rows = cursor.fetchall()
         
-            keywords_set = set()
-            used_keywords_set = set()
+            keyword_usage = Counter()
         
-            for row in rows:
-                keyword = row['name']
-                if keyword and keyword.strip():
-                    clean_keyword = keyword.strip()
-                    keywords_set.add(clean_keyword)
-                    if row['is_used']:
-                        used_keywords_set.add(clean_keyword)
+            # Stream rows from the cursor instead of materializing them with fetchall()
+            stripped_rows = ((name.strip(), usage_count) for name, usage_count in cursor if name)
+            for clean_keyword, usage_count in stripped_rows:
+                if clean_keyword:
+                    # Keywords with the same name under different parents share a count
+                    keyword_usage[clean_keyword] += usage_count
         
-            self.keywords = keywords_set
-            self.used_keywords = used_keywords_set
+            self.keywords = set(keyword_usage)
+            self.used_keywords = {keyword for keyword, usage_count in keyword_usage.items() if usage_count}
+            self.keyword_usage = keyword_usage
         
             logger.info(f"Extracted {len(self.keywords)} unique keywords from catalog ({len(self.used_keywords)} used in images)")
             return self.keywords
@@ -290,12 +1348,16 @@ class KeywordConsolidator:
             
         logger.info("Cleaning and normalizing keywords...")
         
-        # First pass: basic cleaning - do this in one pass
-        cleaned_keywords = {}
-        for keyword in self.keywords:
-            cleaned = self._basic_keyword_cleaning(keyword)
-            if cleaned:  # Skip empty strings
-                cleaned_keywords[keyword] = cleaned
+        # First pass: basic cleaning of the whole keyword set in one batch
+        keywords = list(self.keywords)
+        cleaned_keywords = {
+            keyword: cleaned
+            for keyword, cleaned in zip(keywords, map(_clean_keyword, keywords))
+            if cleaned  # Skip empty strings
+        }
+        
+        # Sum image usage per cleaned form once, for canonical keyword selection
+        self._cleaned_usage = self._usage_by_cleaned_form(cleaned_keywords)
         
         # Get the similarity threshold from config or use default
         similarity_threshold = getattr(self.config, 'keyword_similarity_threshold', 0.92)
@@ -303,7 +1365,8 @@ class KeywordConsolidator:
         # Use LLM for grouping similar keywords if configured
         if hasattr(self.config, 'use_llm_grouping') and self.config.use_llm_grouping:
             logger.info("Using LLM for keyword grouping")
-            unique_cleaned = list(set(cleaned_keywords.values()))
+            # dict.fromkeys dedups in one pass and keeps the cleaning order
+            unique_cleaned = list(dict.fromkeys(cleaned_keywords.values()))
         
             # Group similar keywords using LLM
             similarity_groups = self._group_keywords_with_llm(unique_cleaned)
@@ -318,41 +1381,75 @@ class KeywordConsolidator:
         else:
             # Use traditional similarity-based grouping
             # Speed up the process by creating a sorted list of keywords for faster comparison
-            unique_values = list(set(cleaned_keywords.values()))
-            sorted_by_length = sorted(unique_values, key=len)
+            sorted_by_length = sorted(set(cleaned_keywords.values()), key=len)
+        
+            # Precompute plural forms once so plural matches are simple set lookups
+            variants = {k: _plural_variants(k) for k in sorted_by_length}
         
             # Group similar keywords with optimized algorithm
             similarity_groups = []
-            processed = set()
+        
+            # Keywords not yet in a group, bucketed by length in length-sorted order.
+            # Grouped keywords are removed, so later comparisons never rescan them.
+            unprocessed = defaultdict(dict)
+            for keyword in sorted_by_length:
+                unprocessed[len(keyword)][keyword] = None
+            
+            # Apart from plural forms and very short pairs, similar keywords always
+            # share a trigram, so when the threshold allows it only keywords that
+            # share one are compared, found through an index of trigrams
+            short_pair_length = _trigram_free_length(similarity_threshold)
+            if short_pair_length is not None:
+                position = {k: i for i, k in enumerate(sorted_by_length)}
+                trigram_index = defaultdict(list)
+                for keyword in sorted_by_length:
+                    for gram in _trigrams(keyword):
+                        trigram_index[gram].append(keyword)
         
             # Process keywords in order of length (shortest first)
             for keyword in sorted_by_length:
-                if keyword in processed:
+                keyword_len = len(keyword)
+                bucket = unprocessed[keyword_len]
+                if keyword not in bucket:
                     continue
+                del bucket[keyword]
                 
                 # Skip very short keywords for grouping
-                if len(keyword) < 3:
-                    processed.add(keyword)
+                if keyword_len < 3:
                     similarity_groups.append([keyword])
                     continue
                 
                 # Start a new group with this keyword
                 group = [keyword]
-                processed.add(keyword)
             
                 # Find similar keywords - limit comparisons to keywords within +/-50% of length
-                keyword_len = len(keyword)
                 min_len = max(3, int(keyword_len * 0.5))
                 max_len = int(keyword_len * 1.5) + 1
             
-                # Only compare with unprocessed keywords in the length range
-                potential_matches = [k for k in sorted_by_length if min_len <= len(k) <= max_len and k not in processed]
-            
-                for other in potential_matches:
-                    # Use cached similarity method
-                    if self._are_keywords_similar(keyword, other, similarity_threshold):
-                        group.append(other)
-                        processed.add(other)
+                if short_pair_length is None:
+                    # Only compare with unprocessed keywords in the length range, read
+                    # straight from the length buckets
+                    candidates = [
+                        other
+                        for length in range(min_len, max_len + 1)
+                        for other in unprocessed.get(length, ())
+                    ]
+                else:
+                    found = set(variants[keyword])
+                    for length in range(min_len, min(max_len, short_pair_length - keyword_len) + 1):
+                        found.update(unprocessed.get(length, ()))
+                    for gram in _trigrams(keyword):
+                        found.update(trigram_index[gram])
+                    # Keep the length-bucket order so groups come out as without the index
+                    candidates = sorted(
+                        (other for other in found
+                         if min_len <= len(other) <= max_len and other in unprocessed.get(len(other), ())),
+                        key=position.__getitem__
+                    )
+                similar = self._find_similar_keywords(keyword, candidates, variants, similarity_threshold)
+                group.extend(similar)
+                for other in similar:
+                    del unprocessed[len(other)][other]
             
                 similarity_groups.append(group)
         
@@ -372,8 +1469,10 @@ class KeywordConsolidator:
             else:
                 final_mapping[original] = cleaned
         
-        # Count how many keywords were collapsed
-        unique_cleaned = len(set(final_mapping.values()))
+        # Count how many keywords were collapsed, reusing the distinct values
+        # the cleaned_keywords setter computes anyway
+        self.cleaned_keywords = final_mapping
+        unique_cleaned = len(self._unique_cleaned)
         reduction = len(self.keywords) - unique_cleaned
         
         # Verify we haven't over-consolidated
@@ -381,12 +1480,12 @@ class KeywordConsolidator:
             logger.warning("Excessive keyword consolidation detected, reverting to basic cleaning only")
             # Revert to just basic cleaning without consolidation
             final_mapping = cleaned_keywords
-            unique_cleaned = len(set(final_mapping.values()))
+            self.cleaned_keywords = final_mapping
+            unique_cleaned = len(self._unique_cleaned)
             reduction = len(self.keywords) - unique_cleaned
         
         logger.info(f"Reduced {len(self.keywords)} keywords to {unique_cleaned} normalized terms ({reduction} collapsed)")
         
-        self.cleaned_keywords = final_mapping
         return final_mapping
     
     def _basic_keyword_cleaning(self, keyword: str) -> str:
@@ -399,26 +1498,7 @@ class KeywordConsolidator:
         Returns:
             Cleaned keyword
         """
-        if not keyword:
-            return ""
-        
-        # Convert to lowercase and strip whitespace
-        cleaned = keyword.lower().strip()
-    
-        # Remove leading/trailing punctuation
-        cleaned = cleaned.strip('.,;:!?-_"\'')
-    
-        # Replace multiple spaces with a single space using precompiled pattern
-        cleaned = WHITESPACE_PATTERN.sub(' ', cleaned)
-    
-        # Remove special characters except spaces and hyphens using precompiled pattern
-        cleaned = SPECIAL_CHARS_PATTERN.sub('', cleaned)
-    
-        # Skip very short words (except common words like "a" and "i")
-        if len(cleaned) <= 1 and cleaned not in ['a', 'i']:
-            return ""
-            
-        return cleaned
+        return _clean_keyword(keyword)
     
     def _group_similar_keywords(self, keywords: List[str], similarity_threshold: float = 0.92) -> List[List[str]]:
         """
@@ -434,12 +1514,15 @@ class KeywordConsolidator:
         # Sort keywords by length (shortest first)
         sorted_keywords = sorted(keywords, key=len)
         
+        # Precompute plural forms once so plural matches are simple set lookups
+        variants = {k: _plural_variants(k) for k in sorted_keywords}
+        
         # Initialize groups
         groups = []
         processed = set()
         
         # Process each keyword
-        for keyword in sorted_keywords:
+        for index, keyword in enumerate(sorted_keywords):
             if keyword in processed or not keyword:
                 continue
                 
@@ -452,19 +1535,15 @@ class KeywordConsolidator:
             group = [keyword]
             processed.add(keyword)
             
-            # Find similar keywords
-            for other in sorted_keywords:
-                if other in processed or other == keyword or not other:
-                    continue
-                    
-                # Skip very short keywords for comparison
-                if len(other) < 3:
-                    continue
-                    
-                # Check if they're similar
-                if self._are_keywords_similar(keyword, other, similarity_threshold):
-                    group.append(other)
-                    processed.add(other)
+            # Find similar keywords; everything before this one is already processed.
+            # Very short keywords are skipped for comparison.
+            candidates = [
+                other for other in sorted_keywords[index + 1:]
+                if other not in processed and other != keyword and len(other) >= 3
+            ]
+            similar = self._find_similar_keywords(keyword, candidates, variants, similarity_threshold)
+            group.extend(similar)
+            processed.update(similar)
             
             # Only add groups with multiple keywords
             if len(group) > 1:
@@ -491,199 +1570,238 @@ class KeywordConsolidator:
             List of groups of semantically similar keywords
         """
         if not hasattr(self, '_llm_client'):
-            self._llm_client = RateLimitedLLM(self.ai_provider)
-    
-        # If we have too many keywords, process in batches
-        max_batch_size = 200  # Limit to avoid token limits
-    
-        if len(keywords) > max_batch_size:
-            logger.info(f"Processing {len(keywords)} keywords in batches for LLM grouping")
-            all_groups = []
-        
-            # Process keywords in batches using multiple workers
-            if self.max_workers > 1:
-                # Split keywords into batches
-                batches = []
-                for i in range(0, len(keywords), max_batch_size):
-                    batch = keywords[i:i+max_batch_size]
-                    # Convert to string for hashable cache key
-                    batch_str = '|||||'.join(batch)
-                    batches.append(batch_str)
-            
-                logger.info(f"Processing {len(batches)} batches with up to {self.max_workers} workers")
-            
-                # Process batches with thread pool
-                with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                    # Create a mapping of futures to batch_str
-                    future_to_batch = {
-                        executor.submit(self._llm_client.process_batch, batch_str): batch_str 
-                        for batch_str in batches
-                    }
-                
-                    # Process results as they complete
-                    for future in concurrent.futures.as_completed(future_to_batch):
-                        try:
-                            batch_groups = future.result()
-                        
-                            # Merge with combined results
-                            with self.lock:
-                                all_groups.extend(batch_groups)
-                        except Exception as e:
-                            logger.error(f"Error processing batch: {e}")
+            self._llm_client = RateLimitedLLM(self.ai_provider, cooldown=self._cooldown)
+    
+        # Convert batches to strings for hashable cache keys. The grouping prompt
+        # does not depend on keyword order, so the keywords are sorted first:
+        # the same keywords always make the same batches and cache keys, and
+        # near-identical keywords land in the same batch.
+        batches = ['|||||'.join(batch) for batch in self._pack_batches(sorted(keywords))]
+        logger.info(f"Processing {len(keywords)} keywords in {len(batches)} batches for LLM grouping")
+        
+        return asyncio.run(self._group_keyword_batches_async(batches))
+    
+    async def _group_keyword_batches_async(self, batches: List[str]) -> List[List[str]]:
+        """
+        Group all keyword batches concurrently with the LLM.
+        
+        Args:
+            batches: Keyword batches joined into cache-key strings
             
-                return all_groups
-            else:
-                # Process sequentially if max_workers is 1
-                for i in range(0, len(keywords), max_batch_size):
-                    batch = keywords[i:i+max_batch_size]
-                    batch_str = '|||||'.join(batch)
-                    logger.info(f"Processing batch {i//max_batch_size + 1} with {len(batch)} keywords")
-                    batch_groups = self._llm_client.process_batch(batch_str)
-                    all_groups.extend(batch_groups)
-                    
-                return all_groups
-        else:
-            # Process all keywords at once
-            batch_str = '|||||'.join(keywords)
-            return self._llm_client.process_batch(batch_str)
+        Returns:
+            Combined list of keyword groups from all batches
+        """
+        # Bound the number of in-flight requests to respect provider rate limits
+        sem = asyncio.Semaphore(max(1, self.max_workers))
+        results = await asyncio.gather(
+            *[self._process_llm_keyword_batch_async(batch_str, sem) for batch_str in batches],
+            return_exceptions=True
+        )
+        
+        all_groups = []
+        for batch_idx, batch_groups in enumerate(results):
+            if isinstance(batch_groups, Exception):
+                logger.error(f"Error processing batch {batch_idx+1}: {batch_groups}")
+                continue
+            all_groups.extend(batch_groups)
+        
+        return all_groups
     
-    def _extract_json_array(self, text: str) -> Optional[List]:
+    async def _process_llm_keyword_batch_async(self, batch_str: str, sem: asyncio.Semaphore) -> List[List[str]]:
         """
-        Extract a JSON array from text with improved handling for array responses.
+        Process a single keyword batch with the LLM once a slot is available.
+        
+        The local _group_similar_keywords fallback starts on the shared thread
+        pool at the same time, so it is ready if the LLM fails after all
+        retries, and is cancelled if the LLM succeeds.
         
         Args:
-            text: Text containing a JSON array
+            batch_str: Keyword batch joined into a cache-key string
+            sem: Semaphore limiting the number of concurrent requests
             
         Returns:
-            Parsed JSON array or None if parsing fails
+            List of keyword groups identified by the LLM, or by similarity if it failed
         """
-        try:
-            # First try direct JSON parsing
-            return json.loads(text)
-        except json.JSONDecodeError:
-            logger.debug("Direct JSON parsing failed, trying alternative methods")
-            
-            # Try to extract JSON array with regex
-            # Look for array pattern starting with [ and ending with ]
-            array_match = re.search(r'\[\s*\[.+\]\s*\]', text, re.DOTALL)
-            if array_match:
-                try:
-                    array_text = array_match.group(0)
-                    logger.debug(f"Found potential JSON array: {array_text[:100]}...")
-                    return json.loads(array_text)
-                except json.JSONDecodeError:
-                    logger.debug("Failed to parse JSON array with regex match")
-            
-            # Try to find the array between code blocks
-            code_block_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text, re.DOTALL)
-            if code_block_match:
-                try:
-                    code_text = code_block_match.group(1)
-                    return json.loads(code_text)
-                except json.JSONDecodeError:
-                    logger.debug("Failed to parse JSON from code block")
-            
-            # Try to find array with bracket counting
-            try:
-                logger.debug(f"Attempting to parse JSON array: {text[:100]}...")
-                # Find the first opening bracket
-                start_idx = text.find('[')
-                if start_idx != -1:
-                    # Count brackets to find the matching closing bracket
-                    bracket_count = 1
-                    for i in range(start_idx + 1, len(text)):
-                        if text[i] == '[':
-                            bracket_count += 1
-                        elif text[i] == ']':
-                            bracket_count -= 1
-                            if bracket_count == 0:
-                                # Found the matching closing bracket
-                                json_text = text[start_idx:i+1]
-                                return json.loads(json_text)
-                logger.debug("Failed to parse JSON array with brackets")
-            except Exception as e:
-                logger.debug(f"Failed to parse JSON array with brackets: {e}")
+        fallback_future = self._submit(self._group_similar_keywords, batch_str.split('|||||'))
+        
+        async with sem:
+            groups = await self._llm_client.aprocess_batch(batch_str)
+        if groups:
+            fallback_future.cancel()
+            return groups
+        
+        logger.warning("LLM keyword grouping failed, falling back to similarity-based grouping")
+        return await asyncio.wrap_future(fallback_future)
+    
+    def _pack_batches(self, keywords: List[str], target_tokens: Optional[int] = None, reserve: int = 800) -> List[List[str]]:
+        """
+        Pack keywords into batches that fit a prompt token budget.
+        
+        Tokens are estimated at roughly four characters each plus one for the
+        separator, so short keywords produce fewer, fuller batches while long
+        keywords are split before they overrun the context window.
+        
+        Args:
+            keywords: Keywords to split into batches
+            target_tokens: Approximate token budget per request (defaults to config)
+            reserve: Tokens reserved for the prompt template and instructions
             
-            return None
+        Returns:
+            List of keyword batches
+        """
+        if target_tokens is None:
+            target_tokens = getattr(self.config, 'llm_batch_target_tokens', 3000)
+        budget = max(1, target_tokens - reserve)
+        
+        batches = []
+        batch = []
+        batch_tokens = 0
+        for keyword in keywords:
+            tokens = len(keyword) // 4 + 1
+            if batch and batch_tokens + tokens > budget:
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            batch.append(keyword)
+            batch_tokens += tokens
+        
+        if batch:
+            batches.append(batch)
+        return batches
     
-    def _process_llm_keyword_batch(self, keywords: List[str]) -> List[List[str]]:
+    def _run_llm_batches(self, batches: List[Any], worker_fn: Callable[[Any], Any]) -> Iterator[Tuple[int, Any]]:
         """
-        Process a batch of keywords with the LLM for semantic grouping.
+        Run a worker function over all batches using a thread pool.
+        
+        All batches are submitted before any result is collected so that the
+        LLM calls overlap even when only a single worker is configured. A
+        single batch is run directly on the calling thread.
         
         Args:
-            keywords: Batch of keywords to process
+            batches: Batches to process
+            worker_fn: Function called with each batch
             
         Returns:
-            List of keyword groups identified by the LLM
+            Iterator of (batch index, result) tuples in completion order
         """
-        # Format the prompt for the LLM
-        prompt = f"""
-        I have a list of photography keywords that need to be grouped by semantic similarity.
-        Group keywords that represent the same concept or are very similar.
+        if len(batches) == 1:
+            # A single batch gains nothing from the pool, so run it on this thread
+            try:
+                yield 0, worker_fn(batches[0])
+            except Exception as e:
+                logger.error(f"Error processing batch 1: {e}")
+            return
         
-        For example:
-        - "sunset", "sunsets", "setting sun" should be in one group
-        - "portrait", "portraiture", "portraits" should be in one group
-        - "landscape", "landscapes", "scenic" should be in one group
+        logger.info(f"Processing {len(batches)} batches with up to {max(1, self.max_workers)} workers")
         
-        Here are the keywords:
-        {', '.join(keywords)}
+        future_to_idx = {self._submit(worker_fn, batch): i for i, batch in enumerate(batches)}
         
-        Return the groups as a JSON array of arrays. Each inner array should contain similar keywords.
-        Format: [["keyword1", "keyword2"], ["keyword3", "keyword4", "keyword5"], ...]
+        for future in concurrent.futures.as_completed(future_to_idx):
+            batch_idx = future_to_idx[future]
+            try:
+                yield batch_idx, future.result()
+            except Exception as e:
+                logger.error(f"Error processing batch {batch_idx+1}: {e}")
+    
+    def _call_llm_with_retry(self, prompt: str, parse: Callable[[Optional[Dict[str, Any]]], Any],
+                             max_attempts: Optional[int] = None, description: str = "LLM request",
+                             request: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None) -> Any:
+        """
+        Send a text-only prompt to the AI provider, retrying with backoff.
         
-        IMPORTANT:
-        - Group keywords that mean essentially the same thing
-        - Prefer generic terms over specific ones (e.g., "airplane" over "airplane tail")
-        - Return ONLY the JSON array with no additional text
-        - Make sure to properly close all brackets and format as valid JSON
-        - Do not include any explanations or markdown formatting
+        Retries back off with _next_backoff, like RateLimitedLLM. When the
+        provider reports a rate limit, the shared cooldown holds off every LLM
+        call, including RateLimitedLLM's batches, before the next attempt.
+        
+        Args:
+            prompt: Prompt to send
+            parse: Function turning the provider response into a result; a falsy
+                return value counts as a failed attempt
+            max_attempts: Maximum number of attempts (defaults to config.max_retries)
+            description: What the request is for, used in log messages
+            request: Function sending the prompt (defaults to ai_provider.analyze_text)
+            
+        Returns:
+            The first truthy parsed result, or None if every attempt failed
         """
+        attempts = max_attempts or getattr(self.config, 'max_retries', 3)
+        request = request or self.ai_provider.analyze_text
         
-        # Try up to 3 times to get a valid response
-        for attempt in range(3):
+        backoff = 1
+        for attempt in range(attempts):
+            # Don't send a request the provider would reject while rate-limited
+            self._cooldown.wait()
+            
             try:
-                # Create a dummy image since our AI providers expect an image
-                dummy_image = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
-                
-                # Call the AI provider with the prompt and dummy image
-                response = self.ai_provider.analyze_image(dummy_image, user_prompt=prompt)
-                
-                if response and 'analysis' in response:
-                    # Try to extract JSON from the response
-                    analysis_text = response['analysis']
-                    logger.debug(f"LLM grouping response: {analysis_text[:500]}...")
-                    
-                    # Use our improved JSON extraction method
-                    json_data = self._extract_json_array(analysis_text)
-                    
-                    if json_data and isinstance(json_data, list):
-                        # Filter out empty groups and ensure all groups are lists
-                        valid_groups = []
-                        for group in json_data:
-                            if isinstance(group, list) and len(group) > 0:
-                                valid_groups.append(group)
-                        
-                        if valid_groups:
-                            logger.info(f"LLM identified {len(valid_groups)} keyword groups")
-                            return valid_groups
-                
-                # If we get here, either no response or invalid format
-                logger.warning(f"LLM grouping attempt {attempt+1} failed, retrying...")
-                time.sleep(2)  # Wait before retrying
+                result = parse(request(prompt))
+                if result:
+                    return result
                 
+                logger.warning(f"{description} attempt {attempt+1} failed, retrying...")
             except Exception as e:
-                logger.error(f"Error in LLM keyword grouping (attempt {attempt+1}): {e}")
-                time.sleep(2)  # Wait before retrying
+                logger.error(f"Error in {description} (attempt {attempt+1}): {e}")
+                if _is_rate_limit_error(e):
+                    # The limit applies to every call, so they all back off
+                    backoff = _next_backoff(backoff)
+                    self._cooldown.start_for(e, backoff)
+                    continue
+            
+            if attempt < attempts - 1:
+                backoff = _next_backoff(backoff)
+                time.sleep(backoff)
         
-        # If we get here, LLM grouping failed after all attempts
-        logger.warning("LLM keyword grouping failed, falling back to similarity-based grouping")
-        return self._group_similar_keywords(keywords)
+        return None
+    
+    def _find_similar_keywords(self, keyword: str, candidates: List[str], variants: Dict[str, frozenset],
+                               similarity_threshold: float) -> List[str]:
+        """
+        Find the candidates that _are_keywords_similar would match with a keyword.
+        
+        With rapidfuzz available, the similarity ratios against all candidates
+        are computed in one process.extract call, instead of one
+        _are_keywords_similar call per pair.
+        
+        Args:
+            keyword: Keyword starting a group
+            candidates: Unprocessed keywords to compare against it
+            variants: Plural forms of each keyword, from _plural_variants
+            similarity_threshold: Threshold for considering keywords similar
+            
+        Returns:
+            The similar candidates, in candidate order
+        """
+        keyword_variants = variants[keyword]
+        long_enough = len(keyword) >= 4
+        
+        if _fuzz_process is None:
+            # The rules of _are_keywords_similar, inlined so that most pairs are
+            # settled by the plural, substring and length checks without a call
+            length = len(keyword)
+            return [
+                other for other in candidates
+                if other in keyword_variants or keyword in variants[other]
+                or (long_enough and len(other) >= 4 and (keyword in other or other in keyword))
+                or (2 * min(length, len(other)) >= similarity_threshold * (length + len(other))
+                    and _ratio_at_least(keyword, other, similarity_threshold))
+            ]
+        
+        ratio_matches = {
+            match[0] for match in _fuzz_process.extract(
+                keyword, candidates, scorer=_fuzz.ratio, processor=None,
+                limit=None, score_cutoff=similarity_threshold * 100
+            )
+        }
+        # The remaining rules of _are_keywords_similar: plural forms, and substrings
+        # once both keywords are at least 4 characters long
+        return [
+            other for other in candidates
+            if other in ratio_matches or other in keyword_variants or keyword in variants[other]
+            or (long_enough and len(other) >= 4 and (keyword in other or other in keyword))
+        ]
     
-    @lru_cache(maxsize=10000)
     def _are_keywords_similar(self, keyword1: str, keyword2: str, similarity_threshold: float = 0.92) -> bool:
         """
-        Determine if two keywords are semantically similar with caching to avoid repeated calculations.
+        Determine if two keywords are semantically similar.
     
         Args:
             keyword1: First keyword
@@ -702,19 +1820,22 @@ class KeywordConsolidator:
             if keyword1 in keyword2 or keyword2 in keyword1:
                 return True
     
-        # Check for plural/singular forms
-        if keyword1 + 's' == keyword2 or keyword2 + 's' == keyword1:
-            return True
-        if keyword1 + 'es' == keyword2 or keyword2 + 'es' == keyword1:
-            return True
-        if keyword1.endswith('y') and keyword1[:-1] + 'ies' == keyword2:
-            return True
-        if keyword2.endswith('y') and keyword2[:-1] + 'ies' == keyword1:
+        # Check for plural/singular forms, with the same rules the grouping pass
+        # precomputes with _plural_variants
+        if keyword2 in _plural_variants(keyword1) or keyword1 in _plural_variants(keyword2):
             return True
         
-        # Check similarity ratio - this is the most expensive operation
-        similarity = difflib.SequenceMatcher(None, keyword1, keyword2).ratio()
-        return similarity >= similarity_threshold
+        # The ratio can never exceed 2 * min(len) / (len1 + len2), so pairs of very
+        # different lengths are ruled out before any similarity computation
+        len1, len2 = len(keyword1), len(keyword2)
+        if 2 * min(len1, len2) < similarity_threshold * (len1 + len2):
+            return False
+        
+        if _fuzz is not None:
+            # score_cutoff lets rapidfuzz stop early and return 0 once the bound is unreachable
+            return _fuzz.ratio(keyword1, keyword2, score_cutoff=similarity_threshold * 100) >= similarity_threshold * 100
+        
+        return _ratio_at_least(keyword1, keyword2, similarity_threshold)
         
     def _select_canonical_keyword(self, group: List[str]) -> str:
         """
@@ -733,14 +1854,13 @@ class KeywordConsolidator:
         if len(group) == 1:
             return group[0]
             
-        # Count occurrences in the original keywords
-        counts = defaultdict(int)
-        for original in self.keywords:
-            cleaned = self._basic_keyword_cleaning(original)
-            if cleaned in group:
-                counts[cleaned] += 1
+        # Count how many images use each keyword in the group
+        if not self._cleaned_usage and self.keyword_usage:
+            keywords = list(self.keyword_usage)
+            self._cleaned_usage = self._usage_by_cleaned_form(dict(zip(keywords, map(_clean_keyword, keywords))))
+        counts = {k: self._cleaned_usage[k] for k in group if self._cleaned_usage[k]}
         
-        # If we have counts, use the most common
+        # If we have counts, use the most used
         if counts:
             most_common = max(counts.items(), key=lambda x: x[1])[0]
             return most_common
@@ -754,120 +1874,36 @@ class KeywordConsolidator:
         # If all else fails, use the shortest one
         return min(group, key=len)
     
+    def _usage_by_cleaned_form(self, cleaned_keywords: Dict[str, str]) -> Counter:
+        """
+        Total the image usage of original keywords per cleaned form.
+        
+        Args:
+            cleaned_keywords: Dictionary mapping original keywords to cleaned versions
+            
+        Returns:
+            Counter mapping cleaned keywords to the number of images they tag
+        """
+        usage = Counter()
+        for original, cleaned in cleaned_keywords.items():
+            if cleaned:
+                usage[cleaned] += self.keyword_usage[original]
+        return usage
+    
     def map_keywords_to_taxonomy(self, keywords: List[str]) -> Dict[str, List[str]]:
         """
         Map keywords to taxonomy codes.
         
+        The mapping is memoized per batch by _taxonomy_mapping; every call gets
+        its own lists.
+        
         Args:
             keywords: List of keywords to map
             
         Returns:
             Dictionary mapping taxonomy categories to lists of codes
         """
-        from .film_analysis import get_taxonomy_flat_list
-        
-        # Get the flat list of taxonomy codes
-        taxonomy_codes = get_taxonomy_flat_list()
-        
-        # Initialize taxonomy mapping
-        taxonomy_mapping = {
-            "vs": [],  # Visual Subject codes
-            "ic": [],  # Image Characteristics codes
-            "ce": []   # Contextual Elements codes
-        }
-        
-        # Define keyword to taxonomy code mappings
-        keyword_to_vs = {
-            "portrait": ["VS1.1"],
-            "people": ["VS1"],
-            "person": ["VS1"],
-            "group": ["VS1.2"],
-            "crowd": ["VS1.2"],
-            "nature": ["VS2.1"],
-            "landscape": ["VS2.1"],
-            "architecture": ["VS2.2.1"],
-            "building": ["VS2.2.1"],
-            "street": ["VS2.2.3"],
-            "urban": ["VS2.2.3"],
-            "plant": ["VS3.1.1"],
-            "flower": ["VS3.1.1"],
-            "animal": ["VS3.1.2"],
-            "wildlife": ["VS3.1.2"],
-            "object": ["VS3.2"],
-            "item": ["VS3.2"]
-        }
-        
-        keyword_to_ic = {
-            "black & white": ["IC2.1.1"],
-            "bw": ["IC2.1.1"],
-            "b&w": ["IC2.1.1"],
-            "monochrome": ["IC2.1.2"],
-            "color": ["IC2.1.3"],
-            "high contrast": ["IC2.2.1"],
-            "contrasty": ["IC2.2.1"],
-            "low contrast": ["IC2.2.3"],
-            "soft contrast": ["IC2.2.3"],
-            "shallow depth": ["IC2.3.2"],
-            "bokeh": ["IC2.3.2"],
-            "deep depth": ["IC2.3.1"],
-            "sharp": ["IC2.3.1"],
-            "blur": ["IC2.3.4"],
-            "motion blur": ["IC2.3.4"],
-            "warm": ["IC3.1.1"],
-            "warm tone": ["IC3.1.1"],
-            "cool": ["IC3.1.2"],
-            "cool tone": ["IC3.1.2"],
-            "saturated": ["IC3.2.1"],
-            "vibrant": ["IC3.2.1"],
-            "muted": ["IC3.2.3"],
-            "desaturated": ["IC3.2.3"]
-        }
-        
-        keyword_to_ce = {
-            "golden hour": ["CE1.2.3"],
-            "sunset": ["CE1.2.3"],
-            "sunrise": ["CE1.2.3"],
-            "blue hour": ["CE1.2.4"],
-            "twilight": ["CE1.2.4"],
-            "night": ["CE1.2.5"],
-            "dark": ["CE1.2.5"],
-            "documentary": ["CE3.3.1"],
-            "photojournalism": ["CE3.3.1"],
-            "street photography": ["CE3.3.2"],
-            "fine art": ["CE3.3.3"],
-            "artistic": ["CE3.3.3"],
-            "snapshot": ["CE3.3.4"],
-            "casual": ["CE3.3.4"],
-            "experimental": ["CE3.3.5"],
-            "abstract": ["CE3.3.5"]
-        }
-        
-        # Map keywords to taxonomy codes
-        for keyword in keywords:
-            keyword_lower = keyword.lower()
-            
-            # Check Visual Subject mappings
-            for kw, codes in keyword_to_vs.items():
-                if kw in keyword_lower:
-                    for code in codes:
-                        if code in taxonomy_codes["VS"] and code not in taxonomy_mapping["vs"]:
-                            taxonomy_mapping["vs"].append(code)
-            
-            # Check Image Characteristics mappings
-            for kw, codes in keyword_to_ic.items():
-                if kw in keyword_lower:
-                    for code in codes:
-                        if code in taxonomy_codes["IC"] and code not in taxonomy_mapping["ic"]:
-                            taxonomy_mapping["ic"].append(code)
-            
-            # Check Contextual Elements mappings
-            for kw, codes in keyword_to_ce.items():
-                if kw in keyword_lower:
-                    for code in codes:
-                        if code in taxonomy_codes["CE"] and code not in taxonomy_mapping["ce"]:
-                            taxonomy_mapping["ce"].append(code)
-        
-        return taxonomy_mapping
+        return {section: list(codes) for section, codes in _taxonomy_mapping(tuple(keywords)).items()}
     
     def cluster_keywords(self) -> Dict[str, List[str]]:
         """
@@ -881,7 +1917,7 @@ class KeywordConsolidator:
             self.clean_and_normalize_keywords()
             
         # Use the cleaned keywords for clustering
-        unique_cleaned_keywords = list(set(self.cleaned_keywords.values()))
+        unique_cleaned_keywords = list(self._unique_cleaned)
         
         # Check if we have a reasonable number of keywords to cluster
         if len(unique_cleaned_keywords) < 3:
@@ -894,59 +1930,18 @@ class KeywordConsolidator:
         taxonomy_mapping = self.map_keywords_to_taxonomy(unique_cleaned_keywords)
         logger.info(f"Mapped keywords to taxonomy: VS={len(taxonomy_mapping['vs'])}, IC={len(taxonomy_mapping['ic'])}, CE={len(taxonomy_mapping['ce'])}")
         
-        # Create initial clusters based on taxonomy
+        # Create initial clusters based on taxonomy, lowercasing each keyword once
+        keywords_lower = [(k, k.lower()) for k in unique_cleaned_keywords]
         taxonomy_clusters = {}
-        
-        # Visual Subject clusters
-        if taxonomy_mapping['vs']:
-            # People
-            people_keywords = [k for k in unique_cleaned_keywords if any(k.lower() in ["portrait", "people", "person", "group", "crowd"] or w in k.lower() for w in ["portrait", "people", "person", "group", "crowd"])]
-            if people_keywords:
-                taxonomy_clusters["People"] = people_keywords
-                
-            # Nature
-            nature_keywords = [k for k in unique_cleaned_keywords if any(k.lower() in ["nature", "landscape", "mountain", "forest", "water"] or w in k.lower() for w in ["nature", "landscape", "mountain", "forest", "water"])]
-            if nature_keywords:
-                taxonomy_clusters["Nature"] = nature_keywords
-                
-            # Architecture
-            architecture_keywords = [k for k in unique_cleaned_keywords if any(k.lower() in ["architecture", "building", "structure", "urban", "city"] or w in k.lower() for w in ["architecture", "building", "structure", "urban", "city"])]
-            if architecture_keywords:
-                taxonomy_clusters["Architecture"] = architecture_keywords
-                
-            # Objects
-            object_keywords = [k for k in unique_cleaned_keywords if any(k.lower() in ["object", "item", "thing", "product"] or w in k.lower() for w in ["object", "item", "thing", "product"])]
-            if object_keywords:
-                taxonomy_clusters["Objects"] = object_keywords
-        
-        # Image Characteristics clusters
-        if taxonomy_mapping['ic']:
-            # Style
-            style_keywords = [k for k in unique_cleaned_keywords if any(k.lower() in ["black & white", "monochrome", "high contrast", "low contrast"] or w in k.lower() for w in ["black & white", "monochrome", "high contrast", "low contrast"])]
-            if style_keywords:
-                taxonomy_clusters["Style"] = style_keywords
-                
-            # Color
-            color_keywords = [k for k in unique_cleaned_keywords if any(k.lower() in ["color", "warm", "cool", "saturated", "muted", "vibrant"] or w in k.lower() for w in ["color", "warm", "cool", "saturated", "muted", "vibrant"])]
-            if color_keywords:
-                taxonomy_clusters["Color"] = color_keywords
-                
-            # Technique
-            technique_keywords = [k for k in unique_cleaned_keywords if any(k.lower() in ["focus", "depth of field", "bokeh", "blur", "sharp"] or w in k.lower() for w in ["focus", "depth of field", "bokeh", "blur", "sharp"])]
-            if technique_keywords:
-                taxonomy_clusters["Technique"] = technique_keywords
-        
-        # Contextual Elements clusters
-        if taxonomy_mapping['ce']:
-            # Time
-            time_keywords = [k for k in unique_cleaned_keywords if any(k.lower() in ["golden hour", "blue hour", "night", "sunset", "sunrise", "twilight"] or w in k.lower() for w in ["golden hour", "blue hour", "night", "sunset", "sunrise", "twilight"])]
-            if time_keywords:
-                taxonomy_clusters["Time"] = time_keywords
-                
-            # Genre
-            genre_keywords = [k for k in unique_cleaned_keywords if any(k.lower() in ["documentary", "street photography", "fine art", "snapshot", "experimental"] or w in k.lower() for w in ["documentary", "street photography", "fine art", "snapshot", "experimental"])]
-            if genre_keywords:
-                taxonomy_clusters["Genre"] = genre_keywords
+        for section, category_res in _TAXONOMY_CLUSTER_RES.items():
+            # Visual Subject, Image Characteristics and Contextual Elements clusters
+            if not taxonomy_mapping[section]:
+                continue
+            for category, pattern_re in category_res.items():
+                search = pattern_re.search
+                category_keywords = [k for k, k_lower in keywords_lower if search(k_lower)]
+                if category_keywords:
+                    taxonomy_clusters[category] = category_keywords
         
         # Check if we have a reasonable number of taxonomy-based clusters
         taxonomy_coverage = sum(len(keywords) for keywords in taxonomy_clusters.values())
@@ -980,15 +1975,17 @@ class KeywordConsolidator:
                 logger.info(f"Using traditional clustering for {len(uncovered_keywords)} uncovered keywords")
                 
                 # If we have too many keywords, split them into batches
-                max_batch_size = 250
+                batches = self._pack_batches(uncovered_keywords)
                 
-                if len(uncovered_keywords) > max_batch_size:
-                    logger.info(f"Processing {len(uncovered_keywords)} keywords in batches of {max_batch_size}")
-                    additional_clusters = self._process_keywords_in_batches(uncovered_keywords, max_batch_size)
+                if len(batches) > 1:
+                    logger.info(f"Processing {len(uncovered_keywords)} keywords in {len(batches)} batches")
+                    additional_clusters = self._process_keywords_in_batches(batches)
                 else:
                     # Process all keywords at once
                     prompt = self._get_clustering_prompt(uncovered_keywords)
-                    additional_clusters = self._process_clustering_prompt(prompt)
+                    additional_clusters = self._process_clustering_prompt(
+                        prompt, self._clustering_cache_key(uncovered_keywords), uncovered_keywords
+                    )
                 
                 # Merge with taxonomy clusters
                 for category, keywords in additional_clusters.items():
@@ -998,12 +1995,30 @@ class KeywordConsolidator:
                         taxonomy_clusters[category] = keywords
         
         # Remove duplicates in each category
-        for category in taxonomy_clusters:
-            taxonomy_clusters[category] = list(set(taxonomy_clusters[category]))
+        for category, words in taxonomy_clusters.items():
+            taxonomy_clusters[category] = list(dict.fromkeys(words))
         
         self.keyword_clusters = taxonomy_clusters
         return taxonomy_clusters
     
+    def _cluster_keywords_with_llm(self, keywords: List[str]) -> Dict[str, List[str]]:
+        """
+        Use LLM to cluster keywords into categories, processing batches in parallel.
+        
+        Args:
+            keywords: List of keywords to cluster
+            
+        Returns:
+            Dictionary mapping category names to lists of keywords
+        """
+        batches = self._pack_batches(keywords)
+        
+        results = list(self._run_llm_batches(batches, self._process_llm_clustering_batch))
+        combined_clusters = self._merge_batch_clusters(results)
+        
+        logger.info(f"LLM clustering produced {len(combined_clusters)} categories")
+        return combined_clusters
+    
     def _process_llm_clustering_batch(self, keywords: List[str]) -> Dict[str, List[str]]:
         """
         Process a batch of keywords with the LLM for clustering.
@@ -1018,12 +2033,10 @@ class KeywordConsolidator:
         taxonomy_mapping = self.map_keywords_to_taxonomy(keywords)
         
         # Get categories from config or use default
-        categories = self.config.categories if hasattr(self.config, 'categories') and self.config.categories else [
-            "People", "Nature", "Architecture", "Objects", "Lighting", "Color", 
-            "Composition", "Style", "Technique", "Mood", "Time", "Location"
-        ]
+        categories = self._clustering_categories()
         
-        # Format the prompt for the LLM
+        # Format the prompt once and reuse it across retries
+        kw_str = ', '.join(keywords)
         prompt = f"""
         You are a photography expert tasked with organizing keywords into logical categories.
         
@@ -1031,7 +2044,7 @@ class KeywordConsolidator:
         Analyze these photography keywords and organize them into the provided categories.
         
         KEYWORDS:
-        {', '.join(keywords)}
+        {kw_str}
         
         CATEGORIES:
         {', '.join(categories)}
@@ -1072,44 +2085,31 @@ class KeywordConsolidator:
         - Do not use markdown formatting or code blocks
         """
         
-        # Try up to 3 times to get a valid response
-        for attempt in range(3):
-            try:
-                # Create a dummy image since our AI providers expect an image
-                dummy_image = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
-                
-                # Call the AI provider with the prompt and dummy image
-                response = self.ai_provider.analyze_image(dummy_image, user_prompt=prompt)
-                
-                if response and 'analysis' in response:
-                    # Try to extract JSON from the response
-                    analysis_text = response['analysis']
-                    logger.debug(f"LLM clustering response: {analysis_text[:500]}...")
-                    
-                    # Use our improved JSON extraction method
-                    json_data = self._extract_json_object(analysis_text)
-                    
-                    if json_data and isinstance(json_data, dict):
-                        # Validate that all values are lists
-                        valid_clusters = {}
-                        for category, words in json_data.items():
-                            if isinstance(words, list) and words:
-                                valid_clusters[category] = words
-                            elif isinstance(words, str):
-                                # Handle case where words might be a comma-separated string
-                                valid_clusters[category] = [w.strip() for w in words.split(',') if w.strip()]
-                        
-                        if valid_clusters:
-                            logger.info(f"LLM created {len(valid_clusters)} keyword clusters")
-                            return valid_clusters
-                
-                # If we get here, either no response or invalid format
-                logger.warning(f"LLM clustering attempt {attempt+1} failed, retrying...")
-                time.sleep(2)  # Wait before retrying
-                
-            except Exception as e:
-                logger.error(f"Error in LLM keyword clustering (attempt {attempt+1}): {e}")
-                time.sleep(2)  # Wait before retrying
+        def parse_clusters(response):
+            if not response or 'analysis' not in response:
+                return None
+            
+            # Try to extract JSON from the response
+            analysis_text = response['analysis']
+            logger.debug(f"LLM clustering response: {analysis_text[:500]}...")
+            json_data = self._extract_json_object(analysis_text)
+            if not isinstance(json_data, dict):
+                return None
+            
+            # Keep non-empty lists, splitting comma-separated strings into lists
+            valid_clusters = {
+                category: words if isinstance(words, list) else [w.strip() for w in words.split(',') if w.strip()]
+                for category, words in json_data.items()
+                if words and isinstance(words, (list, str))
+            }
+            
+            if valid_clusters:
+                logger.info(f"LLM created {len(valid_clusters)} keyword clusters")
+            return valid_clusters
+        
+        valid_clusters = self._call_llm_with_retry(prompt, parse_clusters, description="LLM keyword clustering")
+        if valid_clusters:
+            return valid_clusters
         
         # If we get here, LLM clustering failed after all attempts
         logger.warning("LLM keyword clustering failed, falling back to traditional clustering")
@@ -1125,151 +2125,148 @@ class KeywordConsolidator:
         Returns:
             Parsed JSON object or None if parsing fails
         """
-        try:
-            # First try direct JSON parsing
-            return json.loads(text)
-        except json.JSONDecodeError:
-            logger.debug("Direct JSON parsing failed, trying alternative methods")
-            
-            # Try to extract JSON object with regex
-            # Look for object pattern starting with { and ending with }
-            object_match = re.search(r'\{.+\}', text, re.DOTALL)
-            if object_match:
-                try:
-                    object_text = object_match.group(0)
-                    logger.debug(f"Found potential JSON object: {object_text[:100]}...")
-                    return json.loads(object_text)
-                except json.JSONDecodeError:
-                    logger.debug("Failed to parse JSON object with regex match")
-            
-            # Try to find the object between code blocks
-            code_block_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text, re.DOTALL)
-            if code_block_match:
-                try:
-                    code_text = code_block_match.group(1)
-                    return json.loads(code_text)
-                except json.JSONDecodeError:
-                    logger.debug("Failed to parse JSON from code block")
-            
-            # Try to find object with bracket counting
-            try:
-                # Find the first opening brace
-                start_idx = text.find('{')
-                if start_idx != -1:
-                    # Count braces to find the matching closing brace
-                    brace_count = 1
-                    for i in range(start_idx + 1, len(text)):
-                        if text[i] == '{':
-                            brace_count += 1
-                        elif text[i] == '}':
-                            brace_count -= 1
-                            if brace_count == 0:
-                                # Found the matching closing brace
-                                json_text = text[start_idx:i+1]
-                                return json.loads(json_text)
-                logger.debug("Failed to parse JSON object with braces")
-            except Exception as e:
-                logger.debug(f"Failed to parse JSON object with braces: {e}")
-            
-            return None
+        return _parse_json_text(text, '{')
     
-    def _process_keywords_in_batches(self, keywords: List[str], batch_size: int) -> Dict[str, List[str]]:
+    def _process_keywords_in_batches(self, batches: List[List[str]]) -> Dict[str, List[str]]:
         """
         Process keywords in batches to avoid token limits.
         
         Args:
-            keywords: List of all keywords
-            batch_size: Maximum number of keywords per batch
+            batches: Keyword batches, as produced by _pack_batches
             
         Returns:
             Combined clustering results
         """
-        combined_clusters = {}
-        
-        # Split keywords into batches
-        batches = [keywords[i:i + batch_size] for i in range(0, len(keywords), batch_size)]
-        
-        # Process batches in parallel if multiple workers are configured
-        if self.max_workers > 1:
-            logger.info(f"Processing {len(batches)} batches with up to {self.max_workers} workers")
-            
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                # Create a function to process a batch and return the results
-                def process_batch(batch_idx, batch):
-                    logger.info(f"Processing batch {batch_idx+1}/{len(batches)} with {len(batch)} keywords")
-                    prompt = self._get_clustering_prompt(batch)
-                    return self._process_clustering_prompt(prompt)
-                
-                # Submit all batches to the executor
-                future_to_batch = {executor.submit(process_batch, i, batch): (i, batch) for i, batch in enumerate(batches)}
-                
-                # Process results as they complete
-                for future in concurrent.futures.as_completed(future_to_batch):
-                    batch_idx, batch = future_to_batch[future]
-                    try:
-                        batch_clusters = future.result()
-                        
-                        # Merge with combined results
-                        with self.lock:
-                            for category, words in batch_clusters.items():
-                                if category in combined_clusters:
-                                    combined_clusters[category].extend(words)
-                                else:
-                                    combined_clusters[category] = words
-                    except Exception as e:
-                        logger.error(f"Error processing batch {batch_idx+1}: {e}")
+        def process_batch(batch):
+            prompt = self._get_clustering_prompt(batch)
+            return self._process_clustering_prompt(prompt, self._clustering_cache_key(batch), batch)
+        
+        if getattr(self.config, 'coalesce_batches', False):
+            # Send several batches per provider call to save round trips
+            group_size = max(1, getattr(self.config, 'coalesce_group_size', 4))
+            groups = [batches[i:i + group_size] for i in range(0, len(batches), group_size)]
+            results = [
+                (group_idx * group_size + offset, batch_clusters)
+                for group_idx, group_results in self._run_llm_batches(groups, self._process_clustering_batches_coalesced)
+                for offset, batch_clusters in enumerate(group_results)
+            ]
         else:
-            # Process sequentially if max_workers is 1
-            for i, batch in enumerate(batches):
-                logger.info(f"Processing batch {i+1}/{len(batches)} with {len(batch)} keywords")
-                
-                # Process this batch
-                prompt = self._get_clustering_prompt(batch)
-                batch_clusters = self._process_clustering_prompt(prompt)
-                
-                # Merge with combined results
-                for category, words in batch_clusters.items():
-                    if category in combined_clusters:
-                        combined_clusters[category].extend(words)
-                    else:
-                        combined_clusters[category] = words
-        
-        # Remove duplicates in each category
-        for category in combined_clusters:
-            combined_clusters[category] = list(set(combined_clusters[category]))
+            results = list(self._run_llm_batches(batches, process_batch))
+        combined_clusters = self._merge_batch_clusters(results)
         
         logger.info(f"Combined results: {len(combined_clusters)} categories")
         return combined_clusters
     
-    def _get_clustering_prompt(self, keywords: List[str]) -> str:
+    def _merge_batch_clusters(self, results: List[Tuple[int, Dict[str, List[str]]]]) -> Dict[str, List[str]]:
         """
-        Generate a prompt for the AI to cluster keywords.
+        Merge per-batch clustering results into one set of clusters.
+        
+        Workers only return their own batch results, and the merge runs once on
+        the calling thread after all batches finish, so no lock is needed. Results
+        are merged in batch order so the output does not depend on which batch
+        happened to finish first.
         
         Args:
-            keywords: List of keywords to cluster
+            results: (batch index, clusters) tuples as yielded by _run_llm_batches
             
         Returns:
-            Prompt string for the AI
+            Dictionary mapping category names to de-duplicated keyword lists
         """
-        # Map keywords to taxonomy
-        taxonomy_mapping = self.map_keywords_to_taxonomy(keywords)
+        # Accumulate into insertion-ordered dicts used as sets, so duplicates are
+        # dropped as they arrive and no separate de-duplication pass is needed
+        merged = defaultdict(dict)
+        for _, batch_clusters in sorted(results, key=lambda item: item[0]):
+            for category, words in batch_clusters.items():
+                merged[category].update(dict.fromkeys(words))
+        
+        return {category: list(words) for category, words in merged.items()}
+    
+    def _process_clustering_batches_coalesced(self, batches: List[List[str]]) -> List[Dict[str, List[str]]]:
+        """
+        Cluster several keyword batches with a single AI provider call.
+        
+        Batches the response has no usable result for are processed on their
+        own through the regular single-batch path.
+        
+        Args:
+            batches: Keyword batches to cluster together
+            
+        Returns:
+            Clustering results for each batch, in batch order
+        """
+        results = {}
+        
+        # Only send the batches that are not already cached
+        if self._llm_cache:
+            for i, batch in enumerate(batches):
+                cached_clusters = self._llm_cache.get(self._clustering_cache_key(batch))
+                if cached_clusters:
+                    results[i] = cached_clusters
+        pending = [i for i in range(len(batches)) if i not in results]
         
-        categories = self.config.categories if hasattr(self.config, 'categories') and self.config.categories else [
-            "People", "Nature", "Architecture", "Objects", "Lighting", "Color", 
-            "Composition", "Style", "Technique", "Mood", "Time", "Location"
+        if pending:
+            prompt = self._get_coalesced_clustering_prompt([batches[i] for i in pending])
+            try:
+                response = self._call_ai_for_clustering(prompt)
+            except RateLimitError as e:
+                # The batches are retried individually below, after the cooldown
+                self._cooldown.start_for(e, 1)
+                response = None
+            batch_results = response.get('results') if isinstance(response, dict) else None
+            
+            # Fan the combined response out to the batches by their 1-based number
+            for entry in batch_results if isinstance(batch_results, list) else []:
+                if not isinstance(entry, dict) or not isinstance(entry.get('clusters'), dict):
+                    continue
+                number = entry.get('batch')
+                if not isinstance(number, int) or not 1 <= number <= len(pending):
+                    continue
+                
+                clusters = self._parse_clustering_response(entry['clusters'])
+                batch_idx = pending[number - 1]
+                if self._validate_clustering_results(clusters, batches[batch_idx]):
+                    results[batch_idx] = clusters
+                    if self._llm_cache:
+                        self._llm_cache.set(self._clustering_cache_key(batches[batch_idx]), clusters)
+        
+        missing = len(batches) - len(results)
+        if missing:
+            logger.warning(f"Coalesced clustering had no usable result for {missing} of {len(batches)} batches, "
+                           f"processing them individually")
+        
+        return [
+            results[i] if i in results else self._process_clustering_prompt(
+                self._get_clustering_prompt(batch), self._clustering_cache_key(batch), batch
+            )
+            for i, batch in enumerate(batches)
         ]
+    
+    def _get_coalesced_clustering_prompt(self, batches: List[List[str]]) -> str:
+        """
+        Generate a prompt asking the AI to cluster several keyword batches separately.
         
-        # Sort keywords alphabetically for better processing
-        sorted_keywords = sorted(keywords)
+        Args:
+            batches: Keyword batches to cluster
+            
+        Returns:
+            Prompt string for the AI
+        """
+        all_keywords = [keyword for batch in batches for keyword in batch]
+        taxonomy_mapping = self.map_keywords_to_taxonomy(all_keywords)
+        
+        batch_sections = "\n        ".join(
+            f"BATCH {number}: {', '.join(sorted(batch))}" for number, batch in enumerate(batches, 1)
+        )
         
         prompt = f"""
         You are a photography expert tasked with organizing keywords into a logical hierarchy.
         
         TASK:
-        Analyze these photography keywords and organize them into categories and subcategories.
+        Organize each of the following keyword batches, independently of the others,
+        into categories and subcategories.
         
-        KEYWORDS:
-        {', '.join(sorted_keywords)}
+        KEYWORD BATCHES:
+        {batch_sections}
         
         TAXONOMY INFORMATION:
         These keywords map to the following taxonomy codes:
@@ -1278,84 +2275,148 @@ class KeywordConsolidator:
         - Contextual Elements (CE) codes: {', '.join(taxonomy_mapping['ce'])}
         
         INSTRUCTIONS:
-        1. Assign EVERY keyword to one of these main categories: {', '.join(categories)}
+        1. Assign EVERY keyword of each batch to one of these main categories: {', '.join(self._clustering_categories())}
         2. Create appropriate subcategories as needed
         3. Every keyword MUST be assigned to a category - none should be left out
-        4. If a keyword doesn't fit any category well, use your best judgment
-        5. Distribute keywords evenly - don't put too many in one category
-        6. Be consistent with your categorization logic
-        7. Consolidate similar terms (e.g., "airplane", "aircraft", "plane" should all be represented by one term)
-        8. Use the taxonomy information to guide your categorization
+        4. Only use keywords from a batch in that batch's result
+        5. Be consistent with your categorization logic across batches
+        6. Use the taxonomy information to guide your categorization
         
         REQUIRED OUTPUT FORMAT:
-        Return ONLY a JSON object with this structure:
+        Return ONLY a JSON object with one entry in "results" per batch:
         {{
-            "Category1": {{
-                "keywords": ["keyword1", "keyword2"],
-                "subcategories": {{
-                    "Subcategory1": {{
-                        "keywords": ["keyword3", "keyword4"]
+            "results": [
+                {{
+                    "batch": 1,
+                    "clusters": {{
+                        "Category1": {{
+                            "keywords": ["keyword1", "keyword2"],
+                            "subcategories": {{
+                                "Subcategory1": {{
+                                    "keywords": ["keyword3"]
+                                }}
+                            }}
+                        }}
                     }}
                 }}
-            }},
-            "Category2": {{
-                "keywords": ["keyword5", "keyword6"]
-            }}
+            ]
         }}
         
         IMPORTANT:
-        - Include EVERY keyword from the provided list
-        - Use ONLY the main categories listed above
+        - Return a result for EVERY batch, numbered as above
         - Your response must be valid JSON that can be parsed directly
         - Do not include any explanations or text outside the JSON structure
-        - Ensure no keyword appears in multiple categories
-        - Make sure all JSON keys and values are properly quoted
-        - Make sure to properly close all brackets and format as valid JSON
         - Do not use markdown formatting or code blocks
         """
         
         return prompt
     
-    def _process_clustering_prompt(self, prompt: str) -> Dict[str, List[str]]:
+    def _clustering_categories(self) -> List[str]:
+        """
+        Get the main categories the AI should cluster keywords into.
+        
+        Returns:
+            Categories from the config, or the default categories
+        """
+        if hasattr(self.config, 'categories') and self.config.categories:
+            return self.config.categories
+        return list(_DEFAULT_CLUSTERING_CATEGORIES)
+    
+    def _get_clustering_prompt(self, keywords: List[str]) -> str:
+        """
+        Generate a prompt for the AI to cluster keywords.
+        
+        Args:
+            keywords: List of keywords to cluster
+            
+        Returns:
+            Prompt string for the AI
+        """
+        # Map keywords to taxonomy
+        taxonomy_mapping = self.map_keywords_to_taxonomy(keywords)
+        
+        categories = self._clustering_categories()
+        
+        header, footer = _clustering_prompt_template(tuple(categories))
+        taxonomy_section = _CLUSTERING_PROMPT_TAXONOMY.format(
+            vs=', '.join(taxonomy_mapping['vs']),
+            ic=', '.join(taxonomy_mapping['ic']),
+            ce=', '.join(taxonomy_mapping['ce'])
+        )
+        
+        # Sort keywords alphabetically for better processing
+        return header + ', '.join(sorted(keywords)) + taxonomy_section + footer
+    
+    def _clustering_cache_key(self, keywords: List[str]) -> Optional[str]:
+        """
+        Build the LLM cache key for clustering a set of keywords.
+        
+        Args:
+            keywords: Keywords being clustered
+            
+        Returns:
+            Cache key, or None if no LLM cache is configured
+        """
+        if self._llm_cache is None:
+            return None
+        # Responses from another provider or model must not be reused
+        provider_config = getattr(self.config, 'provider', None)
+        return LLMCache.cache_key(
+            keywords, getattr(self.config, 'categories', None), _CLUSTERING_PROMPT_VERSION,
+            provider=getattr(provider_config, 'provider_type', None),
+            model=self.model_override or getattr(provider_config, 'model', None)
+        )
+    
+    def _process_clustering_prompt(self, prompt: str, cache_key: Optional[str] = None,
+                                   keywords: Optional[List[str]] = None) -> Dict[str, List[str]]:
         """
         Process a clustering prompt and return the results.
         
+        Validated results are stored in the LLM cache, if one is configured, and
+        reused on later calls with the same key instead of calling the AI.
+        
         Args:
             prompt: The prompt to send to the AI
+            cache_key: Key for the LLM cache, from _clustering_cache_key
+            keywords: Keywords in the prompt (defaults to all cleaned keywords)
             
         Returns:
             Dictionary mapping category names to lists of keywords
         """
+        if cache_key and self._llm_cache:
+            cached_clusters = self._llm_cache.get(cache_key)
+            if cached_clusters:
+                logger.info(f"Using cached clustering results ({len(cached_clusters)} clusters)")
+                return cached_clusters
+        
+        def parse_clusters(response: Optional[Dict[str, Any]]) -> Optional[Dict[str, List[str]]]:
+            if not response:
+                return None
+            clusters = self._parse_clustering_response(response)
+            return clusters if self._validate_clustering_results(clusters, keywords) else None
+        
         # Try up to 3 times to get a valid response
-        for attempt in range(3):
-            try:
-                # Call the AI provider
-                response = self._call_ai_for_clustering(prompt)
-                
-                if response:
-                    clusters = self._parse_clustering_response(response)
-                    if self._validate_clustering_results(clusters):
-                        logger.info(f"Created {len(clusters)} keyword clusters")
-                        return clusters
-                
-                # If we get here, either no response or invalid format
-                logger.warning(f"Clustering attempt {attempt+1} failed, retrying...")
-                time.sleep(2)  # Wait before retrying
-                
-            except Exception as e:
-                logger.error(f"Error during keyword clustering (attempt {attempt+1}): {e}")
-                time.sleep(2)  # Wait before retrying
+        clusters = self._call_llm_with_retry(prompt, parse_clusters, max_attempts=3,
+                                             description="Keyword clustering",
+                                             request=self._call_ai_for_clustering)
+        if clusters:
+            logger.info(f"Created {len(clusters)} keyword clusters")
+            if cache_key and self._llm_cache:
+                self._llm_cache.set(cache_key, clusters)
+            return clusters
         
         # If we get here, AI clustering failed after all attempts
         logger.warning("AI clustering failed, falling back to simple clustering")
-        return self._fallback_clustering(list(set(self.cleaned_keywords.values())))
+        return self._fallback_clustering(list(keywords if keywords is not None else self._unique_cleaned))
     
-    def _validate_clustering_results(self, clusters: Dict[str, List[str]]) -> bool:
+    def _validate_clustering_results(self, clusters: Dict[str, List[str]],
+                                     keywords: Optional[List[str]] = None) -> bool:
         """
         Validate the clustering results to ensure they're usable.
         
         Args:
             clusters: Dictionary mapping category names to lists of keywords
+            keywords: Keywords that were clustered (defaults to all cleaned keywords)
             
         Returns:
             True if the clusters are valid, False otherwise
@@ -1366,18 +2427,19 @@ class KeywordConsolidator:
             
         # Count total keywords in clusters
         all_clustered_keywords = set()
-        for keywords in clusters.values():
-            all_clustered_keywords.update(keywords)
+        for cluster_keywords in clusters.values():
+            all_clustered_keywords.update(cluster_keywords)
             
-        # Check if we have a reasonable number of keywords
-        unique_cleaned_keywords = set(self.cleaned_keywords.values())
+        # Check if we have a reasonable number of keywords, out of those that
+        # were actually sent, since a batch only holds part of the catalog
+        unique_cleaned_keywords = set(keywords) if keywords is not None else self._unique_cleaned
         coverage_ratio = len(all_clustered_keywords) / len(unique_cleaned_keywords) if unique_cleaned_keywords else 0
         if coverage_ratio < 0.7:  # Increased from 0.5 to 0.7 for better coverage
             logger.warning(f"Clustering only covered {coverage_ratio:.2f} of keywords")
             return False
             
         # Check if any category has too many keywords (potential dumping ground)
-        max_category_size = max(len(keywords) for keywords in clusters.values())
+        max_category_size = max(len(cluster_keywords) for cluster_keywords in clusters.values())
         if max_category_size > len(unique_cleaned_keywords) * 0.5:
             logger.warning("One category contains too many keywords")
             return False
@@ -1395,53 +2457,44 @@ class KeywordConsolidator:
             AI response as a dictionary
         """
         try:
-            # Create a dummy image since our AI providers expect an image
-            # This is a 1x1 transparent pixel encoded as base64
-            dummy_image = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+            # Providers that stream let the JSON be parsed as soon as it closes,
+            # without waiting for or keeping the rest of the response
+            chunks = self.ai_provider.stream_analysis(None, user_prompt=prompt)
+            if chunks is not None:
+                json_data = _parse_json_stream(chunks, '{')
+                if json_data:
+                    return json_data
+                logger.error("No JSON found in streamed AI response")
+                return None
             
-            # Call the AI provider with the prompt and dummy image
-            response = self.ai_provider.analyze_image(dummy_image, user_prompt=prompt)
+            # Call the AI provider with a text-only prompt
+            response = self.ai_provider.analyze_text(prompt)
             
             # Extract the JSON response from the AI
             if response and 'analysis' in response:
                 # Try to find JSON in the response
                 analysis_text = response['analysis']
-                logger.debug(f"AI response: {analysis_text[:500]}...")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"AI response: {analysis_text[:500]}...")
                 
-                # Use our improved JSON extraction method
-                json_data = self._extract_json_object(analysis_text)
+                # Locate and parse the JSON, in a worker process if configured; this
+                # already covers plain JSON, code blocks and JSON embedded in text
+                if self._parse_pool is not None:
+                    json_data = self._parse_pool.submit(_parse_json_text, analysis_text, '{').result()
+                else:
+                    json_data = _parse_json_text(analysis_text, '{')
                 if json_data:
                     return json_data
-                
-                # If extract_json fails, try manual extraction
-                try:
-                    # Try to parse directly if it's already JSON
-                    return json.loads(analysis_text)
-                except json.JSONDecodeError:
-                    # Try to extract JSON from text
-                    json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', analysis_text, re.DOTALL)
-                    if json_match:
-                        try:
-                            return json.loads(json_match.group(1))
-                        except json.JSONDecodeError:
-                            logger.error("Failed to parse JSON from AI response")
-                    else:
-                        # Try to find JSON with curly braces
-                        start = analysis_text.find("{")
-                        end = analysis_text.rfind("}")
-                        if start != -1 and end != -1 and end > start:
-                            try:
-                                return json.loads(analysis_text[start:end+1])
-                            except json.JSONDecodeError:
-                                logger.error("Failed to parse JSON from AI response")
-                        else:
-                            logger.error("No JSON found in AI response")
+                logger.error("No JSON found in AI response")
             
             # If we have structured_data in the response, try to use that
             if response and 'structured_data' in response:
                 return response['structured_data']
                 
             return None
+        except RateLimitError:
+            # Left to the caller, which holds off every LLM call for a while
+            raise
         except Exception as e:
             logger.error(f"Error calling AI for clustering: {e}")
             return None
@@ -1458,76 +2511,69 @@ class KeywordConsolidator:
         """
         clusters = {}
         
-        # Try up to 3 times to parse the response
-        for attempt in range(3):
-            try:
-                # Handle different possible response formats
-                if not response:
-                    return {}
+        try:
+            # Handle different possible response formats
+            if not response:
+                return {}
+                
+            # Check if response is already in the simple format we want
+            if all(isinstance(v, list) for v in response.values()):
+                return response
+                
+            # Extract analysis text if present
+            analysis_text = response.get('analysis', '')
+            if analysis_text:
+                # Try to extract JSON from the text
+                json_data = self._extract_json_object(analysis_text)
+                if json_data and isinstance(json_data, dict):
+                    response = json_data
+            
+            # Process each top-level category
+            delimiter = self.keyword_delimiter
+            for category, data in response.items():
+                # Skip non-dictionary values
+                if not isinstance(data, dict):
+                    if isinstance(data, list):
+                        clusters[category] = data
+                    continue
                     
-                # Check if response is already in the simple format we want
-                if all(isinstance(v, list) for v in response.values()):
-                    return response
+                # Initialize category
+                if category not in clusters:
+                    clusters[category] = []
                     
-                # Extract analysis text if present
-                analysis_text = response.get('analysis', '')
-                if analysis_text:
-                    # Try to extract JSON from the text
-                    json_data = self._extract_json_object(analysis_text)
-                    if json_data and isinstance(json_data, dict):
-                        response = json_data
-                
-                # Process each top-level category
-                for category, data in response.items():
-                    # Skip non-dictionary values
-                    if not isinstance(data, dict):
-                        if isinstance(data, list):
-                            clusters[category] = data
-                        continue
-                        
-                    # Initialize category
-                    if category not in clusters:
-                        clusters[category] = []
-                        
-                    # Add direct keywords
-                    if 'keywords' in data and isinstance(data['keywords'], list):
-                        clusters[category].extend(data['keywords'])
+                # Add direct keywords
+                if 'keywords' in data and isinstance(data['keywords'], list):
+                    clusters[category].extend(data['keywords'])
+                    
+                # Process subcategories
+                if 'subcategories' in data and isinstance(data['subcategories'], dict):
+                    for subcategory, subdata in data['subcategories'].items():
+                        full_category = f"{category}{delimiter}{subcategory}"
+                        clusters[full_category] = []
                         
-                    # Process subcategories
-                    if 'subcategories' in data and isinstance(data['subcategories'], dict):
-                        for subcategory, subdata in data['subcategories'].items():
-                            full_category = f"{category}{self.config.keyword_delimiter if hasattr(self.config, 'keyword_delimiter') else '|'}{subcategory}"
-                            clusters[full_category] = []
-                            
-                            if isinstance(subdata, dict) and 'keywords' in subdata and isinstance(subdata['keywords'], list):
-                                clusters[full_category].extend(subdata['keywords'])
-                            elif isinstance(subdata, list):
-                                clusters[full_category].extend(subdata)
-                
-                # If we still have no clusters, try to interpret the response differently
-                if not clusters:
-                    # Try to handle a flat list of categories with keywords
-                    for category, value in response.items():
-                        if isinstance(value, list):
-                            clusters[category] = value
-                        elif isinstance(value, str):
-                            # Handle case where keywords are comma-separated strings
-                            clusters[category] = [k.strip() for k in value.split(',') if k.strip()]
-                
-                # If we have clusters, return them
-                if clusters:
-                    return clusters
-                
-                # If we get here, parsing failed
-                logger.warning(f"Failed to parse clustering response (attempt {attempt+1})")
-                time.sleep(1)  # Wait before retrying
-                
-            except Exception as e:
-                logger.error(f"Error parsing clustering response (attempt {attempt+1}): {e}")
-                time.sleep(1)  # Wait before retrying
+                        if isinstance(subdata, dict) and 'keywords' in subdata and isinstance(subdata['keywords'], list):
+                            clusters[full_category].extend(subdata['keywords'])
+                        elif isinstance(subdata, list):
+                            clusters[full_category].extend(subdata)
+            
+            # If we still have no clusters, try to interpret the response differently
+            if not clusters:
+                # Try to handle a flat list of categories with keywords
+                for category, value in response.items():
+                    if isinstance(value, list):
+                        clusters[category] = value
+                    elif isinstance(value, str):
+                        # Handle case where keywords are comma-separated strings
+                        clusters[category] = [k.strip() for k in value.split(',') if k.strip()]
+            
+            # If we have clusters, return them
+            if clusters:
+                return clusters
+        except Exception as e:
+            logger.error(f"Error parsing clustering response: {e}", exc_info=True)
+            return {}
         
-        # If we get here, all parsing attempts failed
-        logger.error("Failed to parse clustering response after multiple attempts")
+        logger.error("Failed to parse clustering response")
         return {}
     
     def _fallback_clustering(self, keywords: List[str]) -> Dict[str, List[str]]:
@@ -1541,118 +2587,30 @@ class KeywordConsolidator:
         Returns:
             Dictionary mapping category names to lists of keywords
         """
-        # Define common categories and patterns with expanded keyword lists
-        categories = {
-            "People": [
-                "person", "people", "man", "woman", "child", "family", "portrait", "face", 
-                "boy", "girl", "baby", "adult", "teen", "senior", "crowd", "group", "couple",
-                "wedding", "bride", "groom", "model", "self-portrait", "selfie"
-            ],
-            "Location": [
-                "city", "town", "country", "mountain", "beach", "landscape", "urban", "rural", "street",
-                "park", "forest", "ocean", "sea", "lake", "river", "desert", "jungle", "waterfall",
-                "building", "architecture", "home", "house", "apartment", "indoor", "outdoor", "garden",
-                "field", "farm", "village", "downtown", "suburb", "highway", "road", "path", "trail"
-            ],
-            "Time": [
-                "morning", "evening", "night", "sunset", "sunrise", "dusk", "dawn", "day",
-                "afternoon", "noon", "midnight", "twilight", "hour", "minute", "second",
-                "winter", "summer", "spring", "fall", "autumn", "season", "holiday", "vacation",
-                "weekend", "weekday", "year", "month", "week", "date", "birthday", "anniversary"
-            ],
-            "Color": [
-                "red", "blue", "green", "yellow", "black", "white", "orange", "purple", "pink", "color",
-                "brown", "gray", "grey", "silver", "gold", "bronze", "copper", "turquoise", "teal",
-                "magenta", "cyan", "indigo", "violet", "maroon", "navy", "olive", "lime", "aqua",
-                "pastel", "neon", "bright", "dark", "light", "saturated", "desaturated", "monochrome",
-                "colorful", "vibrant", "muted", "tone", "hue", "shade", "tint"
-            ],
-            "Composition": [
-                "composition", "frame", "rule of thirds", "symmetry", "pattern", "texture", "depth",
-                "foreground", "background", "middle ground", "leading lines", "diagonal", "horizontal",
-                "vertical", "perspective", "angle", "viewpoint", "wide", "narrow", "panorama", "square",
-                "rectangle", "crop", "aspect ratio", "golden ratio", "balance", "negative space",
-                "minimalist", "busy", "simple", "complex", "layered", "flat", "geometric"
-            ],
-            "Lighting": [
-                "light", "shadow", "contrast", "bright", "dark", "silhouette", "backlight",
-                "highlight", "lowlight", "rim light", "key light", "fill light", "natural light",
-                "artificial light", "flash", "strobe", "soft light", "hard light", "diffused",
-                "reflection", "refraction", "specular", "ambient", "mood lighting", "dramatic",
-                "high key", "low key", "exposure", "overexposed", "underexposed", "glow", "beam"
-            ],
-            "Technique": [
-                "long exposure", "macro", "bokeh", "hdr", "panorama", "focus", "depth of field",
-                "shallow depth of field", "deep depth of field", "selective focus", "tilt-shift",
-                "zoom", "telephoto", "wide angle", "fisheye", "prime lens", "zoom lens", "filter",
-                "black and white", "monochrome", "sepia", "vintage", "retro", "film", "digital",
-                "raw", "jpeg", "composite", "double exposure", "multiple exposure", "time-lapse",
-                "slow motion", "high speed", "panning", "handheld", "tripod", "stabilized"
-            ],
-            "Subject": [
-                "animal", "nature", "architecture", "food", "plant", "flower", "tree", "building",
-                "wildlife", "pet", "dog", "cat", "bird", "fish", "insect", "reptile", "mammal",
-                "landscape", "seascape", "cityscape", "still life", "product", "vehicle", "car",
-                "boat", "plane", "train", "bicycle", "motorcycle", "sports", "action", "event",
-                "concert", "performance", "art", "sculpture", "painting", "graffiti", "street art"
-            ],
-            "Mood": [
-                "happy", "sad", "dramatic", "peaceful", "moody", "calm", "energetic", "emotional",
-                "joyful", "melancholic", "nostalgic", "romantic", "mysterious", "eerie", "scary",
-                "tense", "relaxed", "serene", "chaotic", "orderly", "playful", "serious", "formal",
-                "casual", "intimate", "distant", "warm", "cool", "harsh", "soft", "dreamy", "surreal",
-                "realistic", "fantasy", "whimsical", "somber", "uplifting", "inspiring", "depressing"
-            ],
-            "Style": [
-                "vintage", "modern", "minimalist", "abstract", "documentary", "fine art", "commercial",
-                "photojournalism", "fashion", "portrait", "landscape", "street", "architectural",
-                "product", "food", "travel", "sports", "wildlife", "macro", "night", "long exposure",
-                "black and white", "color", "HDR", "panoramic", "aerial", "underwater", "infrared",
-                "tilt-shift", "lomography", "polaroid", "instant", "film", "digital", "smartphone"
-            ],
-            "Technical": [
-                "aperture", "shutter speed", "iso", "exposure", "white balance", "focus", "blur",
-                "sharp", "soft", "noise", "grain", "resolution", "megapixel", "raw", "jpeg", "tiff",
-                "compression", "bit depth", "dynamic range", "histogram", "clipping", "bracketing",
-                "metering", "spot metering", "matrix metering", "center-weighted", "manual", "auto",
-                "program", "priority", "bulb", "continuous", "single shot", "burst", "timer", "remote"
-            ]
-        }
-        
         # Initialize result dictionary
-        result = {category: [] for category in categories}
+        result = {category: [] for category in _FALLBACK_CATEGORIES}
         result["Uncategorized"] = []
         
-        # Categorize each keyword
-        for keyword in keywords:
-            keyword_lower = keyword.lower()
-            assigned = False
-            
-            # Check each category
-            for category, patterns in categories.items():
-                # First check for exact matches or contains
-                for pattern in patterns:
-                    if pattern == keyword_lower or pattern in keyword_lower or keyword_lower in pattern:
-                        result[category].append(keyword)
-                        assigned = True
-                        break
-                        
-                # If not assigned, try word stemming/partial matching
-                if not assigned:
-                    for pattern in patterns:
-                        # Check if the first 4+ characters match (simple stemming)
-                        if len(pattern) >= 4 and len(keyword_lower) >= 4:
-                            if pattern[:4] == keyword_lower[:4]:
-                                result[category].append(keyword)
-                                assigned = True
-                                break
-                
-                if assigned:
-                    break
-            
-            # If not assigned to any category, put in Uncategorized
-            if not assigned:
+        # Categorize each keyword into the first category with a matching pattern,
+        # lowercasing the whole list in one pass
+        keywords_lower = list(map(str.lower, keywords))
+        if self._parse_pool is not None and len(keywords_lower) > _PARALLEL_FALLBACK_MIN_KEYWORDS:
+            # Each keyword is independent, so split large lists across the worker processes
+            chunk_size = -(-len(keywords_lower) // max(1, self.max_workers))
+            chunks = [keywords_lower[i:i + chunk_size] for i in range(0, len(keywords_lower), chunk_size)]
+            category_indexes = [
+                category_index
+                for chunk_indexes in self._parse_pool.map(_fallback_category_indexes, chunks)
+                for category_index in chunk_indexes
+            ]
+        else:
+            category_indexes = _fallback_category_indexes(keywords_lower)
+        
+        for keyword, category_index in zip(keywords, category_indexes):
+            if category_index is None:
                 result["Uncategorized"].append(keyword)
+            else:
+                result[_FALLBACK_CATEGORY_NAMES[category_index]].append(keyword)
         
         # Remove empty categories
         result = {k: v for k, v in result.items() if v}
@@ -1712,11 +2670,10 @@ class KeywordConsolidator:
         # Create mapping from normalized keyword to hierarchical path
         normalized_to_hierarchy = {}
         
-        # Default delimiter if not specified in config
-        delimiter = self.config.keyword_delimiter if hasattr(self.config, 'keyword_delimiter') else '|'
+        delimiter = self.keyword_delimiter
         
         # Map keywords to taxonomy codes
-        unique_keywords = list(set(self.cleaned_keywords.values()))
+        unique_keywords = list(self._unique_cleaned)
         taxonomy_mapping = self.map_keywords_to_taxonomy(unique_keywords)
         
         # First, create hierarchical paths based on taxonomy
@@ -1778,7 +2735,7 @@ class KeywordConsolidator:
                     normalized_to_hierarchy[keyword] = f"{category}{delimiter}{keyword}"
         
         # Check if any normalized keywords were not assigned to categories
-        unassigned_keywords = set(self.cleaned_keywords.values()) - set(normalized_to_hierarchy.keys())
+        unassigned_keywords = self._unique_cleaned.difference(normalized_to_hierarchy)
         if unassigned_keywords:
             logger.warning(f"{len(unassigned_keywords)} normalized keywords were not assigned to categories")
             # Assign unassigned keywords to an "Uncategorized" category
@@ -1807,6 +2764,174 @@ class KeywordConsolidator:
         """
         return str(uuid.uuid4()).upper()
     
+    def _generate_global_ids(self, count: int) -> List[str]:
+        """
+        Generate unique global IDs for a batch of new keywords.
+        
+        The random bytes for the whole batch are read with a single
+        os.urandom call, rather than one call per uuid4().
+        
+        Args:
+            count: Number of IDs to generate
+            
+        Returns:
+            List of upper-case version 4 UUID strings
+        """
+        random_bytes = os.urandom(16 * count)
+        return [
+            str(uuid.UUID(bytes=random_bytes[offset:offset + 16], version=4)).upper()
+            for offset in range(0, 16 * count, 16)
+        ]
+    
+    def _hierarchy_prefixes(self) -> Tuple[Set[str], List[Tuple[str, str]]]:
+        """
+        Decompose the hierarchical keyword paths into all of their levels.
+        
+        Each distinct path is walked up from its leaf, slicing off one level
+        at a time, and the walk stops at the first level already seen: every
+        level above it, and each pair between them, was recorded by an earlier
+        path. Shared prefixes are therefore visited once, not once per path.
+        
+        Returns:
+            Tuple of (every path prefix, distinct (child's parent, child) prefix pairs)
+        """
+        delimiter = self.keyword_delimiter
+        
+        prefixes = set()
+        pairs = []
+        # Bound methods held in locals, out of the per-level attribute lookups
+        add_prefix = prefixes.add
+        add_pair = pairs.append
+        for hierarchical_path in dict.fromkeys(self.keyword_hierarchy.values()):
+            child = hierarchical_path
+            while child not in prefixes:
+                add_prefix(child)
+                cut = child.rfind(delimiter)
+                if cut < 0:
+                    break
+                parent = child[:cut]
+                add_pair((parent, child))
+                child = parent
+        
+        return prefixes, pairs
+    
+    def _insert_keywords(self, cursor: sqlite3.Cursor, names: List[str]) -> List[sqlite3.Row]:
+        """
+        Insert new keywords, each with a new global ID, and return their rows.
+        
+        On SQLite 3.35+ the rows come back from multi-row INSERT ... RETURNING
+        statements. Older builds insert with executemany and read the rows
+        back by id, since rows inserted here get ids above the current maximum.
+        
+        Args:
+            cursor: Database cursor inside the update transaction
+            names: Keyword names to insert
+            
+        Returns:
+            Rows of (id_local, id_global, name) for the inserted keywords
+        """
+        params = list(zip(self._generate_global_ids(len(names)), names))
+        
+        if _SQLITE_HAS_RETURNING:
+            inserted = []
+            for start in range(0, len(params), _KEYWORD_INSERT_ROWS):
+                chunk = params[start:start + _KEYWORD_INSERT_ROWS]
+                cursor.execute(
+                    "INSERT INTO AgLibraryKeyword (id_global, name, dateCreated) VALUES "
+                    + ','.join(["(?, ?, datetime('now'))"] * len(chunk))
+                    + " RETURNING id_local, id_global, name",
+                    [value for row in chunk for value in row]
+                )
+                inserted.extend(cursor.fetchall())
+            return inserted
+        
+        cursor.execute("SELECT COALESCE(MAX(id_local), 0) FROM AgLibraryKeyword")
+        last_id = cursor.fetchone()[0]
+        cursor.executemany(
+            "INSERT INTO AgLibraryKeyword (id_global, name, dateCreated) VALUES (?, ?, datetime('now'))",
+            params
+        )
+        cursor.execute(
+            "SELECT id_local, id_global, name FROM AgLibraryKeyword WHERE id_local > ? ORDER BY id_local",
+            (last_id,)
+        )
+        return cursor.fetchall()
+    
+    def _read_existing_keywords(self, conn: sqlite3.Connection) -> Dict[str, Dict[str, Any]]:
+        """
+        Read every keyword in the catalog with its ids.
+        
+        Rows are streamed into the dictionary a block at a time, so a large
+        catalog is never held as one list of rows next to the dictionary.
+        
+        Args:
+            conn: Catalog database connection
+            
+        Returns:
+            Dictionary mapping keyword names to their 'id' and 'global_id'
+        """
+        cursor = conn.execute("SELECT id_local, id_global, name FROM AgLibraryKeyword")
+        existing_keywords = {}
+        while True:
+            rows = cursor.fetchmany(4096)
+            if not rows:
+                break
+            existing_keywords.update(
+                (name, {'id': id_local, 'global_id': id_global}) for id_local, id_global, name in rows
+            )
+        return existing_keywords
+    
+    def _preload_existing_keywords(self) -> None:
+        """
+        Start reading the existing catalog keywords in the background.
+        
+        Cleaning and clustering do not touch the catalog, so the read runs on
+        its own connection while they do, rather than inside the update
+        transaction. The catalog's data_version is recorded first, so that
+        update_catalog_keywords can tell whether another connection has
+        written to the catalog since.
+        """
+        if not self.db_conn:
+            self.connect_to_db()
+        data_version = self.db_conn.execute("PRAGMA data_version").fetchone()[0]
+        
+        def load() -> Dict[str, Dict[str, Any]]:
+            conn = sqlite3.connect(self.catalog_path)
+            try:
+                return self._read_existing_keywords(conn)
+            finally:
+                conn.close()
+        
+        preload_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._keyword_preload = (self.db_conn, data_version, preload_executor.submit(load))
+        preload_executor.shutdown(wait=False)
+    
+    def _take_preloaded_keywords(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Return the keywords read in the background, if they are still current.
+        
+        Called inside the update transaction. The preload is used only if no
+        other connection has committed to the catalog since it started.
+        
+        Returns:
+            Dictionary of existing keywords, or None if it must be read again
+        """
+        if self._keyword_preload is None:
+            return None
+        conn, data_version, future = self._keyword_preload
+        self._keyword_preload = None
+        
+        try:
+            existing_keywords = future.result()
+        except sqlite3.Error as e:
+            logger.warning(f"Background keyword read failed: {e}")
+            return None
+        
+        if conn is not self.db_conn or self.db_conn.execute("PRAGMA data_version").fetchone()[0] != data_version:
+            logger.info("Catalog changed since the background keyword read, reading keywords again")
+            return None
+        return existing_keywords
+    
     def update_catalog_keywords(self) -> int:
         """
         Update the Lightroom catalog with hierarchical keywords using batch processing.
@@ -1824,8 +2949,9 @@ class KeywordConsolidator:
             cursor = self.db_conn.cursor()
             updated_count = 0
             
-            # Start a transaction
-            self.db_conn.execute("BEGIN TRANSACTION")
+            # Take the write lock up front so the whole update, including the
+            # purge, commits once and cannot fail halfway on a busy catalog
+            self.db_conn.execute("BEGIN IMMEDIATE")
             
             # If drop_all_keywords is set, delete all existing keywords
             if self.drop_all_keywords:
@@ -1834,24 +2960,21 @@ class KeywordConsolidator:
                 cursor.execute("DELETE FROM AgLibraryKeyword")
                 
             # First, check if the AgLibraryKeywordTree table exists
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='AgLibraryKeywordTree'")
-            keyword_tree_exists = cursor.fetchone() is not None
+            keyword_tree_exists = self._table_exists('AgLibraryKeywordTree')
             
-            # Get existing keywords 
-            cursor.execute("SELECT id_local, id_global, name FROM AgLibraryKeyword")
-            existing_keywords = {row['name']: {'id': row['id_local'], 'global_id': row['id_global']} for row in cursor.fetchall()}
+            # Get existing keywords, reusing the background read if it is still current
+            existing_keywords = None if self.drop_all_keywords else self._take_preloaded_keywords()
+            if existing_keywords is None:
+                existing_keywords = self._read_existing_keywords(self.db_conn)
             
-            # Create new hierarchical keywords if they don't exist
-            new_keywords = set()
-            delimiter = self.config.keyword_delimiter if hasattr(self.config, 'keyword_delimiter') else '|'
+            # Every level of every hierarchical path, and each parent/child pair
+            hierarchy_prefixes, hierarchy_pairs = self._hierarchy_prefixes()
             
-            # Find all new keywords that need to be created
-            for hierarchical_path in self.keyword_hierarchy.values():
-                parts = hierarchical_path.split(delimiter)
-                for i in range(len(parts)):
-                    partial_path = delimiter.join(parts[:i+1])
-                    if partial_path not in existing_keywords:
-                        new_keywords.add(partial_path)
+            # Find all new keywords that need to be created. This stays a set
+            # difference rather than INSERT OR IGNORE: that would need a UNIQUE
+            # index on AgLibraryKeyword.name, and Lightroom keyword names repeat
+            # under different parents.
+            new_keywords = hierarchy_prefixes.difference(existing_keywords)
             
             # Add new keywords to the catalog in batches of 500
             new_keywords_list = list(new_keywords)
@@ -1862,94 +2985,87 @@ class KeywordConsolidator:
                 batch = new_keywords_list[i:i+keyword_batch_size]
                 logger.info(f"Processing keyword batch {i//keyword_batch_size + 1}/{(len(new_keywords_list) + keyword_batch_size - 1)//keyword_batch_size}")
             
-                # Process each keyword in the batch
-                for keyword in batch:
-                    # Generate a unique global ID for the new keyword
-                    global_id = self._generate_global_id()
+                inserted = self._insert_keywords(cursor, batch)
+                for row in inserted:
+                    existing_keywords[row['name']] = {'id': row['id_local'], 'global_id': row['id_global']}
                 
-                    cursor.execute(
-                        "INSERT INTO AgLibraryKeyword (id_global, name, dateCreated) VALUES (?, ?, datetime('now'))",
-                        (global_id, keyword)
+                # Also add to keyword tree if the table exists
+                if keyword_tree_exists:
+                    cursor.executemany(
+                        "INSERT INTO AgLibraryKeywordTree (keywordID, lc_name) VALUES (?, ?)",
+                        [(row['id_local'], row['name'].lower()) for row in inserted]
                     )
-                    keyword_id = cursor.lastrowid
-                    existing_keywords[keyword] = {'id': keyword_id, 'global_id': global_id}
-                
-                    # Also add to keyword tree if the table exists
-                    if keyword_tree_exists:
-                        cursor.execute(
-                            "INSERT INTO AgLibraryKeywordTree (keywordID, lc_name) VALUES (?, ?)",
-                            (keyword_id, keyword.lower())
-                        )
         
             # Check if the relationship table exists
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='AgLibraryKeywordTreeRelation'")
-            relation_table_exists = cursor.fetchone() is not None
+            relation_table_exists = self._table_exists('AgLibraryKeywordTreeRelation')
+            
+            # Flat name -> id lookup of the hierarchy keywords for the relationship
+            # loops, rather than indexing existing_keywords twice per keyword
+            keyword_ids = {
+                name: existing_keywords[name]['id']
+                for name in hierarchy_prefixes
+                if name in existing_keywords
+            }
+            get_id = keyword_ids.get
             
             # Update keyword relationships if the table exists
             if relation_table_exists:
                 # Process relationships in batches
                 relationships = []
-                for hierarchical_path in self.keyword_hierarchy.values():
-                    parts = hierarchical_path.split(delimiter)
-                    for i in range(1, len(parts)):
-                        parent = delimiter.join(parts[:i])
-                        child = delimiter.join(parts[:i+1])
-                    
-                        if parent in existing_keywords and child in existing_keywords:
-                            relationships.append((
-                                existing_keywords[child]['id'],  # child_id
-                                existing_keywords[parent]['id']  # parent_id
-                            ))
-            
+                for parent, child in hierarchy_pairs:
+                    parent_id = get_id(parent)
+                    child_id = get_id(child)
+                    if parent_id is not None and child_id is not None:
+                        relationships.append((child_id, parent_id))
+            
+                # Load the existing relationships once and skip those in memory,
+                # rather than probing the table for every pair
+                cursor.execute("SELECT keywordID, parentID FROM AgLibraryKeywordTreeRelation")
+                existing_relationships = {tuple(row) for row in cursor.fetchall()}
+                new_relationships = []
+                for relationship in relationships:
+                    if relationship not in existing_relationships:
+                        existing_relationships.add(relationship)
+                        new_relationships.append(relationship)
+                
                 # Insert relationships in batches
                 relationship_batch_size = 1000
-                for i in range(0, len(relationships), relationship_batch_size):
-                    batch = relationships[i:i+relationship_batch_size]
-                    logger.info(f"Updating relationships batch {i//relationship_batch_size + 1}/{(len(relationships) + relationship_batch_size - 1)//relationship_batch_size}")
+                for i in range(0, len(new_relationships), relationship_batch_size):
+                    batch = new_relationships[i:i+relationship_batch_size]
+                    logger.info(f"Updating relationships batch {i//relationship_batch_size + 1}/{(len(new_relationships) + relationship_batch_size - 1)//relationship_batch_size}")
                 
-                    for child_id, parent_id in batch:
-                        # Check if relationship already exists
-                        cursor.execute(
-                            "SELECT COUNT(*) FROM AgLibraryKeywordTreeRelation WHERE keywordID = ? AND parentID = ?",
-                            (child_id, parent_id)
-                        )
-                        if cursor.fetchone()[0] == 0:
-                            cursor.execute(
-                                "INSERT INTO AgLibraryKeywordTreeRelation (keywordID, parentID) VALUES (?, ?)",
-                                (child_id, parent_id)
-                            )
-                            updated_count += 1
+                    cursor.executemany(
+                        "INSERT INTO AgLibraryKeywordTreeRelation (keywordID, parentID) VALUES (?, ?)",
+                        batch
+                    )
+                    updated_count += len(batch)
             else:
-                # If the relationship table doesn't exist, update the parent field in AgLibraryKeyword
+                # If the relationship table doesn't exist, update the parent field in AgLibraryKeyword,
+                # skipping keywords whose parent is already right (all of them on a re-run)
+                cursor.execute("SELECT id_local, parent FROM AgLibraryKeyword")
+                current_parents = dict(cursor.fetchall())
                 relationships = []
-                for hierarchical_path in self.keyword_hierarchy.values():
-                    parts = hierarchical_path.split(delimiter)
-                    for i in range(1, len(parts)):
-                        parent = delimiter.join(parts[:i])
-                        child = delimiter.join(parts[:i+1])
-                    
-                        if parent in existing_keywords and child in existing_keywords:
-                            relationships.append((
-                                existing_keywords[parent]['id'],  # parent_id
-                                existing_keywords[child]['id']    # child_id
-                            ))
+                for parent, child in hierarchy_pairs:
+                    parent_id = get_id(parent)
+                    child_id = get_id(child)
+                    if parent_id is not None and child_id is not None and current_parents.get(child_id) != parent_id:
+                        relationships.append((parent_id, child_id))
             
                 # Update parent relationships in batches
                 relationship_batch_size = 1000
                 for i in range(0, len(relationships), relationship_batch_size):
                     batch = relationships[i:i+relationship_batch_size]
                 
-                    for parent_id, child_id in batch:
-                        # Update the parent field
-                        cursor.execute(
-                            "UPDATE AgLibraryKeyword SET parent = ? WHERE id_local = ?",
-                            (parent_id, child_id)
-                        )
-                        updated_count += 1
+                    # Update the parent field of the whole batch with one statement
+                    cursor.executemany(
+                        "UPDATE AgLibraryKeyword SET parent = ? WHERE id_local = ?",
+                        batch
+                    )
+                    updated_count += len(batch)
             
             # Purge unused keywords if configured to do so
             if hasattr(self.config, 'purge_unused_keywords') and self.config.purge_unused_keywords:
-                purged_count = self._purge_unused_keywords(cursor, existing_keywords)
+                purged_count = self._purge_unused_keywords(cursor, existing_keywords, hierarchy_prefixes)
                 logger.info(f"Purged {purged_count} unused keywords from catalog")
             
             # Commit the transaction
@@ -1959,85 +3075,138 @@ class KeywordConsolidator:
             
         except sqlite3.Error as e:
             # Rollback in case of error
-            self.db_conn.rollback()
+            if self.db_conn.in_transaction:
+                self.db_conn.rollback()
             logger.error(f"Error updating catalog keywords: {e}")
             raise RuntimeError(f"Error updating catalog keywords: {e}")
+        except Exception:
+            if self.db_conn.in_transaction:
+                self.db_conn.rollback()
+            raise
     
-    def _purge_unused_keywords(self, cursor: sqlite3.Cursor, existing_keywords: Dict[str, Dict[str, Any]]) -> int:
+    def _purge_unused_keywords(self, cursor: sqlite3.Cursor, existing_keywords: Dict[str, Dict[str, Any]],
+                               hierarchy_prefixes: Optional[Set[str]] = None) -> int:
         """
         Purge unused keywords from the catalog.
         
+        Runs inside the caller's transaction under a savepoint, so a failed
+        purge is undone on its own without losing the keyword updates. That
+        includes any indexes dropped when purge_drop_indexes is set.
+        
         Args:
             cursor: Database cursor
             existing_keywords: Dictionary of existing keywords
+            hierarchy_prefixes: Every level of the hierarchical paths, as returned
+                by _hierarchy_prefixes; computed if not given
             
         Returns:
             Number of keywords purged
         """
+        cursor.execute("SAVEPOINT purge_unused_keywords")
         try:
-            # Get all keywords that are actually used in images
+            # Get all keywords that are part of our hierarchy
+            if hierarchy_prefixes is None:
+                hierarchy_prefixes, _ = self._hierarchy_prefixes()
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS lrai_hierarchy_ids (id INTEGER PRIMARY KEY)")
+            cursor.execute("DELETE FROM temp.lrai_hierarchy_ids")
+            cursor.executemany(
+                "INSERT OR IGNORE INTO temp.lrai_hierarchy_ids (id) VALUES (?)",
+                (
+                    (existing_keywords[partial_path]['id'],)
+                    for partial_path in hierarchy_prefixes
+                    if partial_path in existing_keywords
+                )
+            )
+            
+            # Find keywords to purge: not used in images and not part of our
+            # hierarchy. SQLite does the set difference, so only the ids to
+            # delete are read back instead of every keyword and every used one.
+            # They are streamed into a packed int64 array rather than a list
+            # of row objects.
             cursor.execute("""
-                SELECT DISTINCT k.id_local 
+                SELECT k.id_local
                 FROM AgLibraryKeyword k
-                JOIN AgLibraryKeywordImage ki ON k.id_local = ki.tag
+                WHERE NOT EXISTS (SELECT 1 FROM AgLibraryKeywordImage ki WHERE ki.tag = k.id_local)
+                  AND k.id_local NOT IN (SELECT id FROM temp.lrai_hierarchy_ids)
             """)
-            
-            used_keyword_ids = {row[0] for row in cursor.fetchall()}
-            
-            # Get all keywords that are part of our hierarchy
-            hierarchy_keywords = set()
-            delimiter = self.config.keyword_delimiter if hasattr(self.config, 'keyword_delimiter') else '|'
-            
-            for hierarchical_path in self.keyword_hierarchy.values():
-                parts = hierarchical_path.split(delimiter)
-                for i in range(len(parts)):
-                    partial_path = delimiter.join(parts[:i+1])
-                    if partial_path in existing_keywords:
-                        hierarchy_keywords.add(existing_keywords[partial_path]['id'])
-            
-            # Get all keywords
-            cursor.execute("SELECT id_local FROM AgLibraryKeyword")
-            all_keyword_ids = {row[0] for row in cursor.fetchall()}
-            
-            # Find keywords to purge: not used in images and not part of our hierarchy
-            keywords_to_purge = all_keyword_ids - used_keyword_ids - hierarchy_keywords
+            purge_ids = array('q', (row[0] for row in cursor))
+            cursor.execute("DROP TABLE temp.lrai_hierarchy_ids")
             
             # Check if the relationship table exists
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='AgLibraryKeywordTreeRelation'")
-            relation_table_exists = cursor.fetchone() is not None
+            relation_table_exists = self._table_exists('AgLibraryKeywordTreeRelation')
             
             # Delete from relationship table first if it exists
             if relation_table_exists:
-                for keyword_id in keywords_to_purge:
-                    cursor.execute(
-                        "DELETE FROM AgLibraryKeywordTreeRelation WHERE keywordID = ? OR parentID = ?",
-                        (keyword_id, keyword_id)
-                    )
+                _delete_ids_in_chunks(
+                    cursor,
+                    "DELETE FROM AgLibraryKeywordTreeRelation WHERE keywordID IN ({0}) OR parentID IN ({0})",
+                    purge_ids,
+                    binds_per_id=2
+                )
             
             # Delete from keyword tree if it exists
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='AgLibraryKeywordTree'")
-            keyword_tree_exists = cursor.fetchone() is not None
+            keyword_tree_exists = self._table_exists('AgLibraryKeywordTree')
             
             if keyword_tree_exists:
-                for keyword_id in keywords_to_purge:
-                    cursor.execute(
-                        "DELETE FROM AgLibraryKeywordTree WHERE keywordID = ?",
-                        (keyword_id,)
-                    )
+                _delete_ids_in_chunks(cursor, "DELETE FROM AgLibraryKeywordTree WHERE keywordID IN ({0})", purge_ids)
             
-            # Finally delete the keywords themselves
-            for keyword_id in keywords_to_purge:
+            # Finally delete the keywords themselves. They are deleted by rowid, so
+            # for a large purge the secondary indexes can be dropped and rebuilt
+            # once afterwards instead of being updated for every deleted row.
+            saved_indexes = []
+            if purge_ids and getattr(self.config, 'purge_drop_indexes', False):
                 cursor.execute(
-                    "DELETE FROM AgLibraryKeyword WHERE id_local = ?",
-                    (keyword_id,)
+                    "SELECT name, sql FROM sqlite_master "
+                    "WHERE type = 'index' AND tbl_name = 'AgLibraryKeyword' AND sql IS NOT NULL"
                 )
+                saved_indexes = cursor.fetchall()
+                for index in saved_indexes:
+                    cursor.execute(f'DROP INDEX "{index["name"]}"')
+            
+            _delete_ids_in_chunks(cursor, "DELETE FROM AgLibraryKeyword WHERE id_local IN ({0})", purge_ids)
             
-            return len(keywords_to_purge)
+            for index in saved_indexes:
+                cursor.execute(index['sql'])
+            
+            cursor.execute("RELEASE SAVEPOINT purge_unused_keywords")
+            return len(purge_ids)
             
         except sqlite3.Error as e:
             logger.error(f"Error purging unused keywords: {e}")
+            cursor.execute("ROLLBACK TO SAVEPOINT purge_unused_keywords")
+            cursor.execute("RELEASE SAVEPOINT purge_unused_keywords")
             return 0
     
+    def _submit(self, fn: Callable, *args: Any) -> concurrent.futures.Future:
+        """
+        Submit work to the shared thread pool, tracking it until it finishes.
+        
+        Args:
+            fn: Function to run
+            *args: Arguments for fn
+            
+        Returns:
+            Future for the result
+        """
+        future = self._executor.submit(fn, *args)
+        self._pending_futures.add(future)
+        future.add_done_callback(self._pending_futures.discard)
+        return future
+    
+    def close(self) -> None:
+        """Shut down the worker pools and close the LLM cache."""
+        self._keyword_preload = None
+        # Drop queued work, as shutdown(cancel_futures=True) would on Python 3.9+
+        for future in list(self._pending_futures):
+            future.cancel()
+        self._executor.shutdown(wait=False)
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown()
+            self._parse_pool = None
+        if self._llm_cache is not None:
+            self._llm_cache.close()
+            self._llm_cache = None
+    
     def run(self) -> Dict[str, Any]:
         """
         Run the full keyword consolidation process.
@@ -2051,13 +3220,17 @@ class KeywordConsolidator:
             # Extract keywords
             start_keyword_count = len(self.extract_keywords())
             
+            # Read the existing catalog keywords for the update while cleaning and clustering run
+            self._preload_existing_keywords()
+            
             # Clean and normalize keywords
-            cleaned_count = len(set(self.clean_and_normalize_keywords().values()))
+            self.clean_and_normalize_keywords()
+            cleaned_count = len(self._unique_cleaned)
             
             # Try LLM-based grouping first
             if hasattr(self.config, 'use_llm_grouping') and self.config.use_llm_grouping:
                 logger.info("Using LLM-based keyword grouping")
-                unique_keywords = list(set(self.cleaned_keywords.values()))
+                unique_keywords = list(self._unique_cleaned)
                 similarity_groups = self._group_keywords_with_llm(unique_keywords)
                 
                 # If LLM grouping succeeded, use these groups for canonical mapping
@@ -2070,12 +3243,13 @@ class KeywordConsolidator:
                                 canonical_mapping[keyword] = canonical
                     
                     # Update cleaned_keywords with the new canonical forms
-                    for original, cleaned in self.cleaned_keywords.items():
-                        if cleaned in canonical_mapping:
-                            self.cleaned_keywords[original] = canonical_mapping[cleaned]
+                    self.cleaned_keywords = {
+                        original: canonical_mapping.get(cleaned, cleaned)
+                        for original, cleaned in self.cleaned_keywords.items()
+                    }
                     
                     # Update cleaned_count
-                    cleaned_count = len(set(self.cleaned_keywords.values()))
+                    cleaned_count = len(self._unique_cleaned)
                     logger.info(f"LLM grouping reduced keywords to {cleaned_count} normalized terms")
             
             # Cluster keywords
@@ -2111,3 +3285,5 @@ class KeywordConsolidator:
                 "success": False,
                 "error": str(e)
             }
+        finally:
+            self.close()
@@ -0,0 +1,124 @@
+"""
+Persistent cache for parsed LLM responses.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from threading import Lock
+from typing import Any, Iterable, Optional
+
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+class LLMCache:
+    """SQLite-backed cache of parsed LLM responses with a time-to-live."""
+
+    def __init__(self, cache_file: str, ttl: float = 86400):
+        """
+        Initialize the cache, creating the cache database if needed.
+
+        Args:
+            cache_file: Path to the SQLite cache file
+            ttl: Number of seconds a cached response stays valid
+        """
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self._lock = Lock()
+
+        # The cache is shared by the batch worker threads, so one connection is
+        # used from all of them and guarded by the lock
+        self._conn = sqlite3.connect(cache_file, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                created REAL NOT NULL,
+                value TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def cache_key(keywords: Iterable[str], categories: Any, version: int = 1,
+                  provider: Optional[str] = None, model: Optional[str] = None) -> str:
+        """
+        Build a cache key that does not depend on keyword order.
+
+        Args:
+            keywords: Keywords sent to the LLM
+            categories: Categories the LLM was asked to use
+            version: Version of the prompt template, bumped when the prompt changes
+            provider: AI provider the request was sent to
+            model: Model the request was sent to
+
+        Returns:
+            Hex SHA-256 digest identifying the request
+        """
+        payload = json.dumps(
+            {"keywords": sorted(keywords), "categories": categories, "version": version,
+             "provider": provider, "model": model},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Cache key from cache_key()
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT created, value FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            # A locked or damaged cache only costs a fresh LLM call
+            logger.warning(f"Failed to read LLM cache entry: {e}")
+            return None
+
+        if row is None:
+            return None
+
+        created, value = row
+        if time.time() - created > self.ttl:
+            return None
+
+        try:
+            result = json.loads(value)
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable LLM cache entry: {e}")
+            return None
+
+        logger.debug(f"LLM cache hit for {key[:12]}")
+        return result
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a response in the cache.
+
+        Args:
+            key: Cache key from cache_key()
+            value: JSON-serializable value to store
+        """
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, created, value) VALUES (?, ?, ?)",
+                    (key, time.time(), json.dumps(value))
+                )
+                self._conn.commit()
+        except (sqlite3.Error, TypeError) as e:
+            logger.warning(f"Failed to write LLM cache entry: {e}")
+
+    def close(self) -> None:
+        """Close the cache database."""
+        with self._lock:
+            self._conn.close()
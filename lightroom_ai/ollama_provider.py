@@ -7,7 +7,7 @@ import requests
 from typing import Dict, Any, Optional
 
 from .config import AppConfig, OllamaConfig
-from .ai_providers import AiProvider
+from .ai_providers import AiProvider, RateLimitError
 from .logging_setup import get_logger
 
 logger = get_logger(__name__)
@@ -53,6 +53,18 @@ class OllamaProvider(AiProvider):
             return self._call_ollama_api(image_b64, user_prompt)
             
         return self.call_with_retries(make_request)
+    
+    def analyze_text(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Send a text-only prompt to Ollama, without an image.
+        
+        Args:
+            prompt: Prompt for the AI
+            
+        Returns:
+            Dictionary with the response text under 'analysis', None on failure
+        """
+        return self.call_with_retries(lambda: self._call_ollama_text(prompt))
         
     def _call_ollama_api(self, img_b64: str, user_prompt: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
@@ -99,3 +111,38 @@ class OllamaProvider(AiProvider):
         except Exception as e:
             logger.error(f"Unexpected error calling Ollama API: {str(e)}")
             return None
+    
+    def _call_ollama_text(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Call the Ollama API with a text-only prompt.
+        
+        Args:
+            prompt: Prompt for the AI
+            
+        Returns:
+            Dictionary with the response text under 'analysis', None on failure
+        """
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False
+        }
+        
+        try:
+            response = requests.post(self.api_url, json=payload, timeout=30)
+            self.raise_for_rate_limit(response)
+            response.raise_for_status()
+            response_text = response.json().get("response", "")
+            return {"analysis": response_text} if response_text else None
+                
+        except RateLimitError:
+            raise
+        except requests.RequestException as e:
+            logger.error(f"Ollama API network error: {str(e)}")
+            return None
+        except json.JSONDecodeError as e:
+            logger.error(f"Ollama API JSON parsing error: {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error calling Ollama API: {str(e)}")
+            return None
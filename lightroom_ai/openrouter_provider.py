@@ -4,10 +4,10 @@ OpenRouter API implementation for AI image analysis.
 
 import json
 import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
 
 from .config import AppConfig
-from .ai_providers import AiProvider
+from .ai_providers import AiProvider, RateLimitError
 from .logging_setup import get_logger
 
 logger = get_logger(__name__)
@@ -50,28 +50,43 @@ class OpenRouterProvider(AiProvider):
             
         return self.call_with_retries(make_request)
     
-    def _call_openrouter_api(self, img_b64: str, user_prompt: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    def analyze_text(self, prompt: str) -> Optional[Dict[str, Any]]:
         """
-        Call the OpenRouter API with the image.
+        Send a text-only prompt to OpenRouter, without an image.
         
         Args:
-            img_b64: Base64-encoded image string
-            user_prompt: Optional custom user prompt
+            prompt: Prompt for the AI
             
         Returns:
-            Dictionary with API response if successful, None otherwise
+            Dictionary with the response text under 'analysis', None on failure
         """
-        if not self.api_key:
-            logger.error("OpenRouter API key not provided")
-            return None
+        return self.call_with_retries(lambda: self._call_openrouter_text(prompt))
+    
+    def _build_headers(self) -> Dict[str, str]:
+        """
+        Build the HTTP headers for an OpenRouter request.
         
-        headers = {
+        Returns:
+            Dictionary of request headers
+        """
+        return {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}",
             "HTTP-Referer": self.site_url,
             "X-Title": self.title
         }
+    
+    def _build_payload(self, img_b64: Optional[str], user_prompt: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build the request payload for an OpenRouter request.
         
+        Args:
+            img_b64: Base64-encoded image string, or None for a text-only request
+            user_prompt: Optional custom user prompt
+            
+        Returns:
+            Request payload dictionary
+        """
         # Get the analysis prompt (either custom or default)
         prompt = user_prompt if user_prompt else self.get_analysis_prompt()
         
@@ -84,29 +99,165 @@ class OpenRouterProvider(AiProvider):
             {
                 "role": "user",
                 "content": [
-                    {"type": "text", "text": prompt},
-                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{img_b64}"}}
+                    {"type": "text", "text": prompt}
                 ]
             }
         ]
+        if img_b64 is not None:
+            messages[1]["content"].append(
+                {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{img_b64}"}}
+            )
         
         # Prepare the request payload
-        payload = {
+        return {
             "model": self.model,
             "messages": messages,
             "max_tokens": 4000,
             "temperature": 0.0
         }
+    
+    def stream_analysis(self, image_b64: Optional[str], user_prompt: Optional[str] = None) -> Optional[Iterator[str]]:
+        """
+        Stream the raw response text from OpenRouter as it is generated.
+        
+        Args:
+            image_b64: Base64-encoded image string, or None for a text-only request
+            user_prompt: Optional custom user prompt
+            
+        Returns:
+            Iterator of response text chunks, or None if the request failed
+        """
+        if not self.api_key:
+            logger.error("OpenRouter API key not provided")
+            return None
+        
+        payload = self._build_payload(image_b64, user_prompt)
+        payload["stream"] = True
+        
+        try:
+            logger.debug(f"Streaming OpenRouter API response with model: {self.model}")
+            response = requests.post(
+                self.api_url,
+                headers=self._build_headers(),
+                json=payload,
+                timeout=60,
+                stream=True
+            )
+        except Exception as e:
+            logger.error(f"Error calling OpenRouter API: {str(e)}")
+            return None
+        
+        if response.status_code != 200:
+            logger.error(f"OpenRouter API error: {response.status_code} - {response.text}")
+            response.close()
+            if image_b64 is None:
+                # Text requests report rate limits so the caller can hold off
+                self.raise_for_rate_limit(response)
+            return None
+        
+        return self._iter_stream_content(response)
+    
+    def _iter_stream_content(self, response: Any) -> Iterator[str]:
+        """
+        Yield the content deltas of a server-sent event stream.
         
+        The response is closed when the iterator is exhausted or closed early.
+        
+        Args:
+            response: Streaming HTTP response
+            
+        Returns:
+            Iterator of response text chunks
+        """
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                # Skip keep-alive comments and blank separator lines
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    event = json.loads(data)
+                except json.JSONDecodeError:
+                    logger.debug(f"Skipping malformed stream event: {data[:100]}")
+                    continue
+                choices = event.get("choices") or [{}]
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    yield content
+        finally:
+            response.close()
+    
+    def _call_openrouter_api(self, img_b64: str, user_prompt: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Call the OpenRouter API with the image.
+        
+        Args:
+            img_b64: Base64-encoded image string
+            user_prompt: Optional custom user prompt
+            
+        Returns:
+            Dictionary with API response if successful, None otherwise
+        """
+        if not self.api_key:
+            logger.error("OpenRouter API key not provided")
+            return None
+        
+        content = self._request_content(self._build_payload(img_b64, user_prompt))
+        if content is None:
+            return None
+        
+        # Parse the response
+        ai_result = self.parse_response(content)
+        if not ai_result:
+            return None
+            
+        # Format the result
+        return self.format_result(ai_result)
+    
+    def _call_openrouter_text(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Call the OpenRouter API with a text-only prompt.
+        
+        Args:
+            prompt: Prompt for the AI
+            
+        Returns:
+            Dictionary with the response text under 'analysis', None on failure
+        """
+        if not self.api_key:
+            logger.error("OpenRouter API key not provided")
+            return None
+        
+        content = self._request_content(self._build_payload(None, prompt), raise_on_rate_limit=True)
+        return {"analysis": content} if content else None
+    
+    def _request_content(self, payload: Dict[str, Any], raise_on_rate_limit: bool = False) -> Optional[str]:
+        """
+        Send a chat completion request and return the message content.
+        
+        Args:
+            payload: Request payload
+            raise_on_rate_limit: Raise RateLimitError on HTTP 429 instead of returning None
+            
+        Returns:
+            Message content if successful, None otherwise
+            
+        Raises:
+            RateLimitError: If raise_on_rate_limit is set and the API rate-limits the request
+        """
         try:
             logger.debug(f"Calling OpenRouter API with model: {self.model}")
             response = requests.post(
                 self.api_url,
-                headers=headers,
+                headers=self._build_headers(),
                 json=payload,
                 timeout=60
             )
             
+            if raise_on_rate_limit:
+                self.raise_for_rate_limit(response)
             if response.status_code != 200:
                 logger.error(f"OpenRouter API error: {response.status_code} - {response.text}")
                 return None
@@ -119,20 +270,13 @@ class OpenRouterProvider(AiProvider):
             # Extract the response content
             if 'choices' in response_data and len(response_data['choices']) > 0:
                 message = response_data['choices'][0].get('message', {})
-                content = message.get('content', '')
-                
-                # Parse the response
-                ai_result = self.parse_response(content)
-                if not ai_result:
-                    return None
-                    
-                # Format the result
-                formatted_result = self.format_result(ai_result)
-                return formatted_result
+                return message.get('content', '')
             
             logger.error("Invalid response format from OpenRouter API")
             return None
             
+        except RateLimitError:
+            raise
         except Exception as e:
             logger.error(f"Error calling OpenRouter API: {str(e)}")
             if self.config.debug_mode:
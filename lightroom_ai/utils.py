@@ -9,8 +9,21 @@ import json
 from typing import Dict, Any, Optional
 from .logging_setup import get_logger
 
+try:
+    # orjson is several times faster on large responses; its JSONDecodeError
+    # subclasses json.JSONDecodeError, so the handlers below stay the same
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 logger = get_logger(__name__)
 
+# Patterns used by extract_json, compiled once at import
+_CODE_FENCE_RE = re.compile(r'```(?:json)?\s*([\s\S]*?)\s*```')
+_NESTED_ARRAY_RE = re.compile(r'\[\s*\[.*?\]\s*(?:,\s*\[.*?\]\s*)*\]', re.DOTALL)
+_STRING_ARRAY_RE = re.compile(r'\[\s*"[^"]*"(?:\s*,\s*"[^"]*")*\s*\]')
+_UNQUOTED_KEY_RE = re.compile(r'([{,])\s*(\w+):')
+
 def setup_logging(config):
     """
     Set up logging configuration based on the provided app config.
@@ -86,18 +99,15 @@ def extract_json(response_text, logger, debug_mode=False):
     
     # Try direct JSON parsing first
     try:
-        return json.loads(response_text)
+        return _json_loads(response_text)
     except json.JSONDecodeError:
         if debug_mode:
             logger.debug("Direct JSON parsing failed, trying alternative methods")
     
-    # Try to find JSON in code blocks
-    json_pattern = r'```(?:json)?\s*([\s\S]*?)\s*```'
-    matches = re.findall(json_pattern, response_text)
-    
-    for match in matches:
+    # Try to find JSON in code blocks, stopping at the first one that parses
+    for match in _CODE_FENCE_RE.finditer(response_text):
         try:
-            return json.loads(match)
+            return _json_loads(match.group(1))
         except json.JSONDecodeError:
             continue
     
@@ -109,7 +119,7 @@ def extract_json(response_text, logger, debug_mode=False):
             json_str = response_text[start:end+1]
             if debug_mode:
                 logger.debug(f"Attempting to parse JSON object: {json_str[:100]}...")
-            return json.loads(json_str)
+            return _json_loads(json_str)
     except json.JSONDecodeError:
         if debug_mode:
             logger.debug("Failed to parse JSON object with braces")
@@ -122,7 +132,7 @@ def extract_json(response_text, logger, debug_mode=False):
             json_str = response_text[start:end+1]
             if debug_mode:
                 logger.debug(f"Attempting to parse JSON array: {json_str[:100]}...")
-            return json.loads(json_str)
+            return _json_loads(json_str)
     except json.JSONDecodeError:
         if debug_mode:
             logger.debug("Failed to parse JSON array with brackets")
@@ -137,32 +147,31 @@ def extract_json(response_text, logger, debug_mode=False):
                 repaired_json = response_text[:last_comma] + "]"
                 if debug_mode:
                     logger.debug(f"Attempting to repair truncated JSON array: {repaired_json[:100]}...")
-                return json.loads(repaired_json)
+                return _json_loads(repaired_json)
     except json.JSONDecodeError:
         if debug_mode:
             logger.debug("Failed to repair truncated JSON array")
     
     # Try to extract array patterns like [["keyword1"], ["keyword2"]]
     try:
-        array_pattern = r'\[\s*\[.*?\]\s*(?:,\s*\[.*?\]\s*)*\]'
-        array_match = re.search(array_pattern, response_text, re.DOTALL)
+        array_match = _NESTED_ARRAY_RE.search(response_text)
         if array_match:
             json_str = array_match.group(0)
             if debug_mode:
                 logger.debug(f"Attempting to parse array pattern: {json_str[:100]}...")
-            return json.loads(json_str)
+            return _json_loads(json_str)
     except (json.JSONDecodeError, re.error):
         if debug_mode:
             logger.debug("Failed to parse array pattern")
     
     # Try to extract individual array elements and reconstruct
     try:
-        elements = re.findall(r'\[\s*"[^"]*"(?:\s*,\s*"[^"]*")*\s*\]', response_text)
+        elements = _STRING_ARRAY_RE.findall(response_text)
         if elements:
             reconstructed = "[" + ",".join(elements) + "]"
             if debug_mode:
                 logger.debug(f"Attempting to parse reconstructed array: {reconstructed[:100]}...")
-            return json.loads(reconstructed)
+            return _json_loads(reconstructed)
     except (json.JSONDecodeError, re.error):
         if debug_mode:
             logger.debug("Failed to reconstruct array from elements")
@@ -172,8 +181,8 @@ def extract_json(response_text, logger, debug_mode=False):
         # Replace single quotes with double quotes
         fixed_text = response_text.replace("'", '"')
         # Add missing quotes around keys
-        fixed_text = re.sub(r'([{,])\s*(\w+):', r'\1"\2":', fixed_text)
-        return json.loads(fixed_text)
+        fixed_text = _UNQUOTED_KEY_RE.sub(r'\1"\2":', fixed_text)
+        return _json_loads(fixed_text)
     except json.JSONDecodeError:
         if debug_mode:
             logger.debug("Failed to fix JSON syntax errors")
@@ -0,0 +1,87 @@
+"""
+Tests for the catalog database module.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from lightroom_ai.catalog_db import CatalogDatabase
+from lightroom_ai.config import AppConfig
+
+
+class TestCatalogDatabase(unittest.TestCase):
+    """Test cases for the CatalogDatabase class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.catalog_path = os.path.join(self.temp_dir, "test.lrcat")
+
+        # Create a minimal catalog with the keyword tables
+        self.conn = sqlite3.connect(self.catalog_path)
+        self.conn.executescript("""
+            CREATE TABLE AgLibraryKeyword (
+                id_local INTEGER PRIMARY KEY,
+                name TEXT,
+                lc_name TEXT,
+                includeOnExport INTEGER,
+                id_global TEXT
+            );
+            CREATE TABLE AgLibraryKeywordImage (
+                id_local INTEGER PRIMARY KEY,
+                image INTEGER,
+                tag INTEGER
+            );
+            INSERT INTO AgLibraryKeyword (id_local, name) VALUES (9, 'dog');
+            INSERT INTO AgLibraryKeyword (id_local, name) VALUES (5, 'dog');
+            INSERT INTO AgLibraryKeyword (id_local, name) VALUES (7, 'AI_Processed');
+            INSERT INTO AgLibraryKeywordImage (image, tag) VALUES (1, 7);
+        """)
+        self.conn.commit()
+
+        self.db = CatalogDatabase(self.catalog_path, AppConfig())
+
+    def tearDown(self):
+        """Tear down test fixtures."""
+        self.conn.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _keyword_ids(self, name):
+        """Return the ids of all keywords with the given name."""
+        rows = self.conn.execute("SELECT id_local FROM AgLibraryKeyword WHERE name = ?", (name,)).fetchall()
+        return [row[0] for row in rows]
+
+    def test_apply_keywords_links_each_keyword_once(self):
+        """Test that keywords are inserted or reused and linked to the image once."""
+        metadata = {"keywords": ["dog", "cat", "cat"], "tags": ["cat", "AI_Processed"], "aesthetic_score": 7.5}
+
+        self.db._apply_keywords(self.conn.cursor(), 1, metadata)
+
+        # Existing keywords are reused, with the lowest id winning for duplicate
+        # names, and new keywords are inserted once despite repeats in the input
+        self.assertEqual(sorted(self._keyword_ids("dog")), [5, 9])
+        self.assertEqual(len(self._keyword_ids("cat")), 1)
+        self.assertEqual(len(self._keyword_ids("AI_Score_7.5")), 1)
+
+        # The existing link is kept, and no link is made twice
+        links = [row[0] for row in self.conn.execute("SELECT tag FROM AgLibraryKeywordImage WHERE image = 1")]
+        expected = [7, 5, self._keyword_ids("cat")[0], self._keyword_ids("AI_Score_7.5")[0]]
+        self.assertCountEqual(links, expected)
+
+    def test_apply_keywords_again_adds_nothing(self):
+        """Test that applying the same keywords twice changes nothing the second time."""
+        metadata = {"keywords": ["dog", "cat"], "aesthetic_score": 5.0}
+        self.db._apply_keywords(self.conn.cursor(), 1, metadata)
+        keyword_count = self.conn.execute("SELECT COUNT(*) FROM AgLibraryKeyword").fetchone()[0]
+        link_count = self.conn.execute("SELECT COUNT(*) FROM AgLibraryKeywordImage").fetchone()[0]
+
+        self.db._apply_keywords(self.conn.cursor(), 1, metadata)
+
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM AgLibraryKeyword").fetchone()[0], keyword_count)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM AgLibraryKeywordImage").fetchone()[0], link_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,519 @@
+"""
+Tests for the keyword consolidator module.
+"""
+import difflib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from lightroom_ai.ai_providers import RateLimitError
+from lightroom_ai.claude_provider import ClaudeProvider
+from lightroom_ai.config import AppConfig
+from lightroom_ai.keyword_consolidator import KeywordConsolidator, RateLimitedLLM, _parse_json_stream, _quick_ratio
+
+
+class TestKeywordConsolidator(unittest.TestCase):
+    """Test cases for the KeywordConsolidator class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.catalog_path = os.path.join(self.temp_dir, "test.lrcat")
+
+        # Create a minimal catalog with the keyword tables
+        conn = sqlite3.connect(self.catalog_path)
+        conn.executescript("""
+            CREATE TABLE AgLibraryKeyword (
+                id_local INTEGER PRIMARY KEY,
+                id_global TEXT,
+                name TEXT,
+                dateCreated TEXT,
+                parent INTEGER
+            );
+            CREATE TABLE AgLibraryKeywordImage (
+                id_local INTEGER PRIMARY KEY,
+                image INTEGER,
+                tag INTEGER
+            );
+        """)
+        conn.commit()
+        conn.close()
+
+        self.config = AppConfig()
+
+        # Mock the AI provider
+        self.mock_ai_provider = MagicMock()
+        self.mock_ai_provider.stream_analysis.return_value = None
+        self.ai_patch = patch('lightroom_ai.keyword_consolidator.AiProvider')
+        self.mock_ai_class = self.ai_patch.start()
+        self.mock_ai_class.get_provider.return_value = self.mock_ai_provider
+
+    def tearDown(self):
+        """Tear down test fixtures."""
+        self.ai_patch.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def _add_keywords(self, names, used=()):
+        """Insert keywords into the test catalog, tagging the used ones on an image."""
+        conn = sqlite3.connect(self.catalog_path)
+        for name in names:
+            cursor = conn.execute(
+                "INSERT INTO AgLibraryKeyword (id_global, name) VALUES (?, ?)",
+                (f"GID-{name}", name)
+            )
+            if name in used:
+                conn.execute(
+                    "INSERT INTO AgLibraryKeywordImage (image, tag) VALUES (?, ?)",
+                    (1, cursor.lastrowid)
+                )
+        conn.commit()
+        conn.close()
+
+    def test_extract_keywords(self):
+        """Test that keywords are extracted, stripped and flagged as used."""
+        self._add_keywords([" sunset ", "portrait", "dog", "", None], used={"dog", " sunset "})
+        # Tag the same keyword on a second image to check used keywords are not duplicated
+        conn = sqlite3.connect(self.catalog_path)
+        conn.execute("INSERT INTO AgLibraryKeywordImage (image, tag) SELECT 2, id_local FROM AgLibraryKeyword WHERE name = 'dog'")
+        conn.commit()
+        conn.close()
+
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        keywords = consolidator.extract_keywords()
+
+        self.assertEqual(keywords, {"sunset", "portrait", "dog"})
+        self.assertEqual(consolidator.used_keywords, {"sunset", "dog"})
+        self.assertEqual(consolidator.keyword_usage["dog"], 2)
+        self.assertEqual(consolidator.keyword_usage["portrait"], 0)
+        consolidator.db_conn.close()
+
+    def test_create_catalog_indexes(self):
+        """Test that the optional indexes are created on the tables present in the catalog."""
+        self.config.create_catalog_indexes = True
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator.connect_to_db()
+
+        indexes = {row[0] for row in consolidator.db_conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+
+        self.assertIn("idx_lrai_keywordimage_tag", indexes)
+        self.assertNotIn("idx_lrai_keywordtree_keyword", indexes)
+        consolidator.db_conn.close()
+
+    def test_clean_and_normalize_keywords(self):
+        """Test that plural forms and near-duplicates collapse to one canonical keyword."""
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator.keywords = {"Sunset", "sunsets", "City", "cities", "mountain", "river", "photograph", "photographs!"}
+
+        mapping = consolidator.clean_and_normalize_keywords()
+
+        self.assertEqual(mapping["Sunset"], mapping["sunsets"])
+        self.assertEqual(mapping["City"], mapping["cities"])
+        self.assertEqual(mapping["photograph"], mapping["photographs!"])
+        self.assertEqual(mapping["mountain"], "mountain")
+        self.assertEqual(mapping["river"], "river")
+
+    def test_trigram_index_matches_full_comparison(self):
+        """Test that grouping through the trigram index finds the same groups as comparing every pair."""
+        keywords = {"sky", "skies", "spy", "spies", "abab", "baba", "watercolour", "watercolor",
+                    "portrait", "portraits", "seascape", "sea", "river bank", "riverbank", "landscape"}
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator.keywords = set(keywords)
+        indexed = consolidator.clean_and_normalize_keywords()
+
+        with patch("lightroom_ai.keyword_consolidator._trigram_free_length", return_value=None):
+            consolidator = KeywordConsolidator(self.catalog_path, self.config)
+            consolidator.keywords = set(keywords)
+            compared = consolidator.clean_and_normalize_keywords()
+
+        self.assertEqual(indexed, compared)
+        self.assertEqual(indexed["sky"], indexed["skies"])
+
+    def test_canonical_keyword_prefers_most_used(self):
+        """Test that the keyword tagging the most images becomes canonical."""
+        self._add_keywords(["sunset", "sunsets"], used={"sunsets"})
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator.extract_keywords()
+
+        mapping = consolidator.clean_and_normalize_keywords()
+
+        self.assertEqual(mapping["sunset"], "sunsets")
+        self.assertEqual(mapping["sunsets"], "sunsets")
+        consolidator.db_conn.close()
+
+    def test_are_keywords_similar(self):
+        """Test the similarity check on plurals, near-duplicates and unrelated keywords."""
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+
+        self.assertTrue(consolidator._are_keywords_similar("city", "cities"))
+        self.assertTrue(consolidator._are_keywords_similar("watercolour", "watercolor"))
+        self.assertFalse(consolidator._are_keywords_similar("portrait", "landscape"))
+        self.assertFalse(consolidator._are_keywords_similar("sea", "seascape photography"))
+
+    def test_quick_ratio_matches_difflib(self):
+        """Test that the cached-count bound equals difflib's quick_ratio."""
+        for first, second in [("watercolour", "watercolor"), ("portrait", "landscape"), ("aab", "abb")]:
+            self.assertEqual(
+                _quick_ratio(first, second),
+                difflib.SequenceMatcher(None, first, second).quick_ratio()
+            )
+
+    def test_map_keywords_to_taxonomy(self):
+        """Test that taxonomy codes are collected once each, in keyword order."""
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+
+        mapping = consolidator.map_keywords_to_taxonomy(["Sunset Street", "building", "Warm Tone portrait", "street"])
+
+        self.assertEqual(mapping["vs"], ["VS2.2.3", "VS2.2.1", "VS1.1"])
+        self.assertEqual(mapping["ic"], ["IC3.1.1"])
+        self.assertEqual(mapping["ce"], ["CE1.2.3"])
+
+    def test_extract_json_object(self):
+        """Test JSON extraction from wrapped responses, including repeated ones."""
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        response = 'Here you go:\n```json\n{"Nature": ["tree", "river"]}\n```'
+
+        first = consolidator._extract_json_object(response)
+        first["Nature"].append("mountain")
+        second = consolidator._extract_json_object(response)
+
+        self.assertEqual(second, {"Nature": ["tree", "river"]})
+        self.assertIsNone(consolidator._extract_json_object("no json here"))
+
+    def test_parse_json_stream_stops_at_first_object(self):
+        """Test that streamed JSON is parsed across chunks and the stream is closed early."""
+        read = []
+
+        def chunks():
+            for chunk in ['Sure: {"Nature": ["tr', 'ee", "a } in \\"text\\""]', '}', ' trailing', ' more']:
+                read.append(chunk)
+                yield chunk
+
+        result = _parse_json_stream(chunks(), '{')
+
+        self.assertEqual(result, {"Nature": ["tree", 'a } in "text"']})
+        self.assertEqual(len(read), 3)
+        self.assertEqual(_parse_json_stream(iter(['{bad}', ' then {"a": 1}']), '{'), {"a": 1})
+        self.assertIsNone(_parse_json_stream(iter(['no ', 'json']), '{'))
+
+    def test_fallback_clustering(self):
+        """Test that keywords go to the first category with a matching pattern."""
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+
+        clusters = consolidator._fallback_clustering(["portraits", "Sunset glow", "beachfront", "qqq"])
+
+        self.assertEqual(clusters["People"], ["portraits"])
+        self.assertEqual(clusters["Time"], ["Sunset glow"])
+        self.assertEqual(clusters["Location"], ["beachfront"])
+        self.assertEqual(clusters["Uncategorized"], ["qqq"])
+
+    @patch('lightroom_ai.keyword_consolidator.time.sleep')
+    def test_coalesced_clustering_falls_back_per_batch(self, mock_sleep):
+        """Test that one call clusters several batches and unusable results are retried alone."""
+        envelope = {"results": [{"batch": 1, "clusters": {
+            "Nature": {"keywords": ["tree", "river"]},
+            "Animals": {"keywords": ["dog", "cat"]}
+        }}]}
+        self.mock_ai_provider.analyze_text.side_effect = [{"analysis": json.dumps(envelope)}] + [None] * 3
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator.cleaned_keywords = {k: k for k in ["tree", "river", "dog", "cat", "car"]}
+
+        results = consolidator._process_clustering_batches_coalesced([["tree", "river", "dog", "cat"], ["car"]])
+
+        self.assertEqual(results[0], {"Nature": ["tree", "river"], "Animals": ["dog", "cat"]})
+        # Only the second batch's keywords are in its fallback clusters
+        self.assertEqual([k for words in results[1].values() for k in words], ["car"])
+        # One coalesced call, then the single-batch retries for the second batch
+        self.assertEqual(self.mock_ai_provider.analyze_text.call_count, 4)
+
+    def test_coalesced_clustering_validates_each_batch_alone(self):
+        """Test that batches of similar size are each validated against their own keywords."""
+        batches = [[f"alpha{i:02d}" for i in range(40)], [f"beta{i:02d}" for i in range(40)]]
+        envelope = {"results": [
+            {"batch": number, "clusters": {
+                "First": {"keywords": batch[:20]},
+                "Second": {"keywords": batch[20:]}
+            }}
+            for number, batch in enumerate(batches, 1)
+        ]}
+        self.mock_ai_provider.analyze_text.return_value = {"analysis": json.dumps(envelope)}
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator.cleaned_keywords = {k: k for batch in batches for k in batch}
+
+        results = consolidator._process_clustering_batches_coalesced(batches)
+
+        self.assertEqual(results, [{"First": batch[:20], "Second": batch[20:]} for batch in batches])
+        self.mock_ai_provider.analyze_text.assert_called_once()
+
+    @patch('lightroom_ai.keyword_consolidator.time.sleep')
+    def test_clustering_rate_limit_shares_cooldown(self, mock_sleep):
+        """Test that a rate-limited clustering call holds off the keyword grouping client too."""
+        self.mock_ai_provider.stream_analysis.side_effect = RateLimitError("API rate limit exceeded", retry_after=30)
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator.cleaned_keywords = {k: k for k in ["tree", "river", "dog", "cat"]}
+
+        consolidator._process_clustering_prompt("prompt")
+        with patch('lightroom_ai.keyword_consolidator.asyncio.sleep', new=AsyncMock()) as mock_async_sleep:
+            consolidator._group_keywords_with_llm(["dog", "dogs"])
+
+        # The clustering retries and the grouping client both waited out the
+        # cooldown started by the first rate-limited call
+        self.assertGreater(mock_sleep.call_args_list[0][0][0], 25)
+        self.assertGreater(mock_async_sleep.await_args_list[0][0][0], 25)
+        self.mock_ai_provider.analyze_text.assert_not_called()
+
+    def test_run_llm_batches(self):
+        """Test that batch results keep their index and a single batch runs on the calling thread."""
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+
+        results = dict(consolidator._run_llm_batches([[1, 2], [3], [4, 5, 6]], len))
+        single = list(consolidator._run_llm_batches(["only"], lambda batch: threading.get_ident()))
+
+        self.assertEqual(results, {0: 2, 1: 1, 2: 3})
+        self.assertEqual(single, [(0, threading.get_ident())])
+        consolidator.close()
+
+    def test_close_cancels_queued_work(self):
+        """Test that closing the consolidator drops work still waiting for a worker."""
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        release = threading.Event()
+        running = [consolidator._submit(release.wait) for _ in range(max(1, consolidator.max_workers))]
+        queued = consolidator._submit(len, "queued")
+
+        consolidator.close()
+        release.set()
+
+        self.assertTrue(queued.cancelled())
+        self.assertTrue(all(future.result() for future in running))
+
+    def test_llm_grouping_reuses_batches_in_any_order(self):
+        """Test that the same keywords in a different order hit the grouping cache."""
+        self.mock_ai_provider.aanalyze_text = AsyncMock(return_value={'analysis': '[["dog", "dogs"]]'})
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+
+        first = consolidator._group_keywords_with_llm(["dogs", "cat", "dog"])
+        second = consolidator._group_keywords_with_llm(["dog", "dogs", "cat"])
+
+        self.assertEqual(first, second)
+        self.mock_ai_provider.aanalyze_text.assert_awaited_once()
+        consolidator.close()
+
+    @patch('lightroom_ai.keyword_consolidator.asyncio.sleep', new_callable=AsyncMock)
+    def test_llm_grouping_falls_back_after_failure(self, mock_sleep):
+        """Test that a batch the LLM cannot group is grouped by similarity instead."""
+        self.mock_ai_provider.aanalyze_text = AsyncMock(return_value=None)
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+
+        groups = consolidator._group_keywords_with_llm(["dog", "dogs", "cat"])
+
+        self.assertEqual(self.mock_ai_provider.aanalyze_text.await_count, 3)
+        # Backoff only between attempts, not after the last one
+        self.assertEqual(mock_sleep.await_count, 2)
+        self.assertCountEqual(groups, [["dog", "dogs"], ["cat"]])
+        consolidator.close()
+
+    def test_llm_grouping_starts_fallback_alongside_llm(self):
+        """Test that the similarity fallback runs during the LLM call and the LLM result wins."""
+        release = threading.Event()
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator._group_similar_keywords = MagicMock(side_effect=lambda keywords: release.wait())
+        in_flight = []
+
+        async def analyze(prompt):
+            in_flight.append(len(consolidator._pending_futures))
+            return {'analysis': '[["dog", "dogs"]]'}
+
+        self.mock_ai_provider.aanalyze_text = AsyncMock(side_effect=analyze)
+
+        groups = consolidator._group_keywords_with_llm(["dog", "dogs"])
+        release.set()
+
+        self.assertEqual(groups, [["dog", "dogs"]])
+        self.assertEqual(in_flight, [1])
+        consolidator.close()
+
+    def test_hierarchy_prefixes_visits_shared_levels_once(self):
+        """Test that paths sharing prefixes give each level and pair exactly once."""
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator.keyword_hierarchy = {
+            "dog": "Animals|Pets|dog", "cat": "Animals|Pets|cat", "owl": "Animals|owl", "Pets": "Animals|Pets"
+        }
+
+        prefixes, pairs = consolidator._hierarchy_prefixes()
+
+        self.assertEqual(prefixes, {"Animals", "Animals|Pets", "Animals|Pets|dog", "Animals|Pets|cat", "Animals|owl"})
+        self.assertEqual(sorted(pairs), [
+            ("Animals", "Animals|Pets"), ("Animals", "Animals|owl"),
+            ("Animals|Pets", "Animals|Pets|cat"), ("Animals|Pets", "Animals|Pets|dog"),
+        ])
+
+    def test_update_catalog_keywords(self):
+        """Test that missing hierarchy keywords are inserted and linked to their parents."""
+        self._add_keywords(["dog"])
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator.keyword_hierarchy = {"dog": "Animals|Pets|dog", "cat": "Animals|Pets|cat"}
+
+        consolidator.update_catalog_keywords()
+
+        rows = consolidator.db_conn.execute("SELECT id_local, id_global, name, parent FROM AgLibraryKeyword").fetchall()
+        by_name = {row['name']: row for row in rows}
+        self.assertEqual(set(by_name), {"dog", "Animals", "Animals|Pets", "Animals|Pets|dog", "Animals|Pets|cat"})
+        self.assertEqual(by_name["Animals|Pets"]['parent'], by_name["Animals"]['id_local'])
+        self.assertEqual(by_name["Animals|Pets|cat"]['parent'], by_name["Animals|Pets"]['id_local'])
+        self.assertEqual(len({row['id_global'] for row in rows}), len(rows))
+        # Running again finds every parent already set
+        self.assertEqual(consolidator.update_catalog_keywords(), 0)
+        consolidator.db_conn.close()
+
+    def test_update_catalog_keywords_without_returning(self):
+        """Test that keyword ids are read back when SQLite has no RETURNING support."""
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator.keyword_hierarchy = {"dog": "Animals|dog"}
+
+        with patch('lightroom_ai.keyword_consolidator._SQLITE_HAS_RETURNING', False):
+            consolidator.update_catalog_keywords()
+
+        rows = consolidator.db_conn.execute("SELECT id_local, name, parent FROM AgLibraryKeyword").fetchall()
+        by_name = {row['name']: row for row in rows}
+        self.assertEqual(by_name["Animals|dog"]['parent'], by_name["Animals"]['id_local'])
+        consolidator.db_conn.close()
+
+    def test_preloaded_keywords_are_reread_after_catalog_change(self):
+        """Test that keywords read in the background are not used once the catalog has changed."""
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator._preload_existing_keywords()
+        consolidator._keyword_preload[2].result()
+        self._add_keywords(["Animals"])
+        consolidator.keyword_hierarchy = {"dog": "Animals|dog"}
+
+        consolidator.update_catalog_keywords()
+
+        names = [row[0] for row in consolidator.db_conn.execute("SELECT name FROM AgLibraryKeyword")]
+        self.assertEqual(sorted(names), ["Animals", "Animals|dog"])
+        consolidator.db_conn.close()
+
+    def test_update_catalog_keywords_relation_table(self):
+        """Test that relationships are inserted once, skipping those already in the catalog."""
+        self._add_keywords(["Animals", "Animals|dog"])
+        conn = sqlite3.connect(self.catalog_path)
+        conn.executescript("""
+            CREATE TABLE AgLibraryKeywordTreeRelation (keywordID INTEGER, parentID INTEGER);
+            INSERT INTO AgLibraryKeywordTreeRelation
+                SELECT c.id_local, p.id_local FROM AgLibraryKeyword c, AgLibraryKeyword p
+                WHERE c.name = 'Animals|dog' AND p.name = 'Animals';
+        """)
+        conn.close()
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator.keyword_hierarchy = {"dog": "Animals|dog", "cat": "Animals|cat", "kitten": "Animals|cat"}
+
+        updated = consolidator.update_catalog_keywords()
+
+        rows = consolidator.db_conn.execute("""
+            SELECT c.name, p.name FROM AgLibraryKeywordTreeRelation r
+            JOIN AgLibraryKeyword c ON c.id_local = r.keywordID
+            JOIN AgLibraryKeyword p ON p.id_local = r.parentID
+        """).fetchall()
+        self.assertEqual(sorted(tuple(row) for row in rows), [("Animals|cat", "Animals"), ("Animals|dog", "Animals")])
+        self.assertEqual(updated, 1)
+        consolidator.db_conn.close()
+
+    def test_update_catalog_keywords_purges_unused(self):
+        """Test that the purge removes only keywords that are neither used nor in the hierarchy."""
+        self._add_keywords(["dog", "stale", "tagged"], used={"tagged"})
+        self.config.purge_unused_keywords = True
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator.keyword_hierarchy = {"dog": "Animals|dog"}
+
+        consolidator.update_catalog_keywords()
+
+        names = {row[0] for row in consolidator.db_conn.execute("SELECT name FROM AgLibraryKeyword")}
+        self.assertEqual(names, {"tagged", "Animals", "Animals|dog"})
+        consolidator.db_conn.close()
+
+    def test_purge_drop_indexes_restores_indexes(self):
+        """Test that keyword indexes dropped for the purge are recreated afterwards."""
+        self._add_keywords(["dog", "stale"])
+        conn = sqlite3.connect(self.catalog_path)
+        conn.execute("CREATE INDEX idx_keyword_name ON AgLibraryKeyword (name)")
+        conn.commit()
+        conn.close()
+        self.config.purge_unused_keywords = True
+        self.config.purge_drop_indexes = True
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator.keyword_hierarchy = {"dog": "Animals|dog"}
+
+        consolidator.update_catalog_keywords()
+
+        names = {row[0] for row in consolidator.db_conn.execute("SELECT name FROM AgLibraryKeyword")}
+        self.assertEqual(names, {"Animals", "Animals|dog"})
+        indexes = consolidator.db_conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'AgLibraryKeyword'"
+        ).fetchall()
+        self.assertEqual([row[0] for row in indexes], ["idx_keyword_name"])
+        consolidator.db_conn.close()
+
+    def test_failed_purge_keeps_keyword_updates(self):
+        """Test that a failing purge is rolled back without losing the new hierarchy keywords."""
+        self._add_keywords(["stale"])
+        # The purge clears the keyword tree before failing on the keyword itself
+        conn = sqlite3.connect(self.catalog_path)
+        conn.executescript("""
+            CREATE TABLE AgLibraryKeywordTree (keywordID INTEGER, lc_name TEXT);
+            INSERT INTO AgLibraryKeywordTree SELECT id_local, name FROM AgLibraryKeyword;
+            CREATE TRIGGER block_delete BEFORE DELETE ON AgLibraryKeyword
+            BEGIN SELECT RAISE(ABORT, 'blocked'); END;
+        """)
+        conn.close()
+        self.config.purge_unused_keywords = True
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        consolidator.keyword_hierarchy = {"dog": "Animals|dog"}
+
+        consolidator.update_catalog_keywords()
+        consolidator.db_conn.close()
+
+        conn = sqlite3.connect(self.catalog_path)
+        names = {row[0] for row in conn.execute("SELECT name FROM AgLibraryKeyword")}
+        tree_names = {row[0] for row in conn.execute("SELECT lc_name FROM AgLibraryKeywordTree")}
+        conn.close()
+        self.assertEqual(names, {"stale", "Animals", "Animals|dog"})
+        self.assertEqual(tree_names, {"stale", "animals", "animals|dog"})
+
+    def test_rate_limit_cools_down_every_batch(self):
+        """Test that an HTTP 429 from the provider holds off the next provider call."""
+        provider = ClaudeProvider(AppConfig())
+        rate_limited = MagicMock(status_code=429, headers={"Retry-After": "5"})
+        success = MagicMock(status_code=200, headers={})
+        success.json.return_value = {"content": [{"text": '[["dog", "dogs"]]'}]}
+        llm = RateLimitedLLM(provider)
+
+        with patch('lightroom_ai.claude_provider.requests.post', side_effect=[rate_limited, success]) as mock_post, \
+                patch('lightroom_ai.ai_providers.time.sleep') as provider_sleep, \
+                patch('lightroom_ai.keyword_consolidator.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+            self.assertEqual(llm.process_batch("dog|||||dogs"), [["dog", "dogs"]])
+
+        # The provider surfaced the 429 instead of retrying it on its own, and the
+        # batch waited out the shared cooldown for at least the Retry-After time
+        self.assertEqual(mock_post.call_count, 2)
+        provider_sleep.assert_not_called()
+        mock_sleep.assert_awaited_once()
+        self.assertGreater(mock_sleep.await_args[0][0], 4)
+
+    def test_pack_batches(self):
+        """Test that keyword batches respect the token budget."""
+        consolidator = KeywordConsolidator(self.catalog_path, self.config)
+        keywords = [f"keyword{i:04d}" for i in range(1000)]
+
+        batches = consolidator._pack_batches(keywords, target_tokens=300, reserve=100)
+
+        self.assertGreater(len(batches), 1)
+        self.assertEqual([k for batch in batches for k in batch], keywords)
+        for batch in batches:
+            self.assertLessEqual(sum(len(k) // 4 + 1 for k in batch), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Tests for the LLM response cache.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from lightroom_ai.llm_cache import LLMCache
+
+
+class TestLLMCache(unittest.TestCase):
+    """Test cases for the LLMCache class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.temp_dir, "llm_cache.db")
+
+    def tearDown(self):
+        """Tear down test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_cache_key_ignores_keyword_order(self):
+        """Test that the same keywords in any order give the same key."""
+        key1 = LLMCache.cache_key(["tree", "river", "dog"], ["Nature"])
+        key2 = LLMCache.cache_key(["dog", "tree", "river"], ["Nature"])
+
+        self.assertEqual(key1, key2)
+        self.assertNotEqual(key1, LLMCache.cache_key(["tree", "river", "dog"], ["Animals"]))
+        self.assertNotEqual(key1, LLMCache.cache_key(["tree", "river", "dog"], ["Nature"], version=2))
+
+    def test_cache_key_depends_on_provider_and_model(self):
+        """Test that responses from another provider or model get a different key."""
+        key = LLMCache.cache_key(["tree"], None, provider="claude", model="claude-v1")
+
+        self.assertNotEqual(key, LLMCache.cache_key(["tree"], None, provider="ollama", model="claude-v1"))
+        self.assertNotEqual(key, LLMCache.cache_key(["tree"], None, provider="claude", model="claude-v2"))
+
+    def test_set_and_get_persist_across_instances(self):
+        """Test that cached values are returned, including after reopening the cache."""
+        cache = LLMCache(self.cache_file)
+        key = LLMCache.cache_key(["tree"], None)
+        self.assertIsNone(cache.get(key))
+
+        cache.set(key, {"Nature": ["tree"]})
+        cache.close()
+
+        reopened = LLMCache(self.cache_file)
+        self.assertEqual(reopened.get(key), {"Nature": ["tree"]})
+        reopened.close()
+
+    def test_unreadable_cache_is_a_miss(self):
+        """Test that a database error on lookup is treated as a cache miss."""
+        cache = LLMCache(self.cache_file)
+        key = LLMCache.cache_key(["tree"], None)
+        cache.set(key, {"Nature": ["tree"]})
+        cache._conn.execute("DROP TABLE llm_cache")
+
+        self.assertIsNone(cache.get(key))
+        cache.close()
+
+    def test_expired_entries_are_ignored(self):
+        """Test that entries older than the TTL are treated as missing."""
+        cache = LLMCache(self.cache_file, ttl=-1)
+        key = LLMCache.cache_key(["tree"], None)
+        cache.set(key, {"Nature": ["tree"]})
+
+        self.assertIsNone(cache.get(key))
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()